@@ -12,7 +12,9 @@ a = Analysis(
         ('fonts/*', 'fonts/'),
         ('icons/dark/*', 'icons/dark/'),
         ('icons/light/*', 'icons/light/'),
-        ('co.py', '.')
+        ('co.py', '.'),
+        ('packing.py', '.'),
+        ('cache.py', '.')
     ],
     hiddenimports=[],
     hookspath=[],
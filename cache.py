@@ -0,0 +1,197 @@
+"""Caches used by co to skip repeated work.
+
+On-disk entries are plain files in a cache directory; the least recently
+used ones are evicted once the directory grows past its size budget.
+"""
+from collections import OrderedDict
+import hashlib
+import os
+import pickle
+import tempfile
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+
+def _atomic_write(directory, path, write):
+    """Write through a temporary file so readers never see a partial entry"""
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _evict(directory, suffix, max_bytes):
+    """Drop least recently used entries until the directory fits max_bytes"""
+    entries = []
+    for name in os.listdir(directory):
+        if name.endswith(suffix):
+            path = os.path.join(directory, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+def file_digest(file_path, block_size=1024 * 1024):
+    """Content hash of a file, read in blocks"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class InputCache:
+    """Parsed demand tables stored as .npz files, keyed by file content.
+
+    The key combines the file's content hash with the parser version, so
+    a renamed or touched file still hits and a parser change never serves
+    stale tables.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, file_path, version):
+        return f"{file_digest(file_path)}-v{version}"
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, key):
+        """Return the cached DataFrame for key, or None"""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as stored:
+                data = pd.DataFrame({
+                    'Profil': pd.Categorical.from_codes(stored['profile_codes'], stored['profiles']),
+                    'Qté': stored['qty'],
+                    'Long.': stored['length'],
+                    'Poids': stored['weight'],
+                    'Pds Tot': stored['total_weight']
+                })
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            # Damaged entry: drop it so the file is parsed and stored afresh
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        # Mark as recently used for eviction
+        os.utime(path)
+        return data
+
+    def store(self, key, data):
+        profile = data['Profil'].astype('category')
+
+        def write(f):
+            np.savez(
+                f,
+                profile_codes=profile.cat.codes.to_numpy(),
+                profiles=profile.cat.categories.to_numpy(dtype=str),
+                qty=data['Qté'].to_numpy(),
+                length=data['Long.'].to_numpy(),
+                weight=data['Poids'].to_numpy(),
+                total_weight=data['Pds Tot'].to_numpy()
+            )
+
+        _atomic_write(self.directory, self._path(key), write)
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        _evict(self.directory, '.npz', self.max_bytes)
+
+
+class ResultCache:
+    """Packed plans (packing.StockUsage) keyed by everything that shapes them.
+
+    A bounded in-memory LRU serves repeated runs within one process. When a
+    directory is set, entries are also pickled there so they survive a
+    restart, with the same size-bounded LRU eviction as InputCache.
+    """
+
+    def __init__(self, max_entries=512, directory=None, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def key(lengths, counts, stock_length, mode, kerf, trim_start, trim_end, version):
+        """Canonical hash of one profile's demand multiset and packing settings"""
+        lengths = np.asarray(lengths, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        order = np.lexsort((counts, lengths))
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(lengths[order].tobytes())
+        digest.update(counts[order].tobytes())
+        settings = (int(stock_length), mode, float(kerf), float(trim_start), float(trim_end), version)
+        digest.update(repr(settings).encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        """Return the cached plan for key, or None"""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if self.directory is None:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                usage = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Truncated or foreign pickles can raise almost anything; drop
+            # the entry so the profile is packed and stored afresh
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        os.utime(path)
+        self._remember(key, usage)
+        return usage
+
+    def put(self, key, usage):
+        """Store a plan; the on-disk tier is trimmed by evict(), once per batch of puts"""
+        self._remember(key, usage)
+        if self.directory is not None:
+            _atomic_write(self.directory, self._path(key),
+                          lambda f: pickle.dump(usage, f, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def evict(self):
+        """Drop least recently used on-disk entries until the directory fits max_bytes"""
+        if self.directory is not None and os.path.isdir(self.directory):
+            _evict(self.directory, '.pkl', self.max_bytes)
+
+    def _remember(self, key, usage):
+        self._entries[key] = usage
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Forget the in-memory entries (the on-disk tier is left alone)"""
+        self._entries.clear()
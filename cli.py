@@ -0,0 +1,272 @@
+"""Headless command-line runner for the cutting optimizer.
+
+Runs work files through load, clean, optimize and the selected exporters
+without the GUI, e.g. from cron:
+
+    python cli.py jobs/*.xlsx --settings settings.ods --artifacts plan-excel invoice-pdf
+
+Work files may also be given as directories or quoted glob patterns. With
+--jobs N they are processed concurrently by N long-lived worker processes,
+each paying the font, translation and matplotlib setup only once, and a
+manifest of per-file timings and totals is written next to the outputs.
+
+PyQt5 is never imported, and matplotlib only when the plan image is
+requested.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import datetime
+import glob
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+import co
+import plan_render
+
+# Outputs that can be requested, in the order they are written: co.main's
+# own, plus the vector plans drawn without matplotlib
+ARTIFACTS = list(co.ARTIFACTS) + ['plan-svg', 'plan-pdf']
+
+# Written when --artifacts is not given
+DEFAULT_ARTIFACTS = list(co.ARTIFACTS)
+
+# Same default stock length as the GUI
+DEFAULT_LENGTH = 12000
+
+WORK_FILE_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='cli.py',
+        description='Optimize cutting plans for work files without the GUI.'
+    )
+    parser.add_argument('work_files', nargs='+', help='Excel or CSV work files, directories or glob patterns')
+    parser.add_argument('--settings', help='Stock lengths per profile (.ods, .xlsx, .csv or .json)')
+    parser.add_argument('--default-length', type=int,
+                        help=f'Default stock length in mm (settings "Default" row, else {DEFAULT_LENGTH})')
+    parser.add_argument('--mode', choices=list(co.packing.ENGINES), default='ffd',
+                        help='Packing engine (default: ffd)')
+    parser.add_argument('--kerf', type=float, default=0, help='Blade width in mm (default: 0)')
+    parser.add_argument('--trim-start', type=float, default=0, help='Trim at the start of each bar in mm')
+    parser.add_argument('--trim-end', type=float, default=0, help='Trim at the end of each bar in mm')
+    parser.add_argument('--weight-error', type=float, default=12, help='Weight error margin in %% (default: 12)')
+    parser.add_argument('--steel-price', type=float, default=0, help='Steel price per kg (default: 0)')
+    parser.add_argument('--language', choices=['en', 'fr', 'ar'], default='fr', help='Export language (default: fr)')
+    parser.add_argument('--artifacts', nargs='*', choices=ARTIFACTS, default=DEFAULT_ARTIFACTS,
+                        help=f'Outputs to write (default: {" ".join(DEFAULT_ARTIFACTS)}); '
+                             'pass none for statistics only')
+    parser.add_argument('--output-dir', default='output', help='Directory for the outputs (default: ./output)')
+    parser.add_argument('--jobs', type=int, default=1, help='Work files processed concurrently (default: 1)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes used to pack the profiles of one file (default: 1, ignored with --jobs)')
+    parser.add_argument('--manifest', help='Summary manifest path (default: OUTPUT_DIR/manifest.json)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not use the parsed-input and result caches')
+    return parser.parse_args(argv)
+
+
+def run_file(input_file, settings_df, default_length, args):
+    """Optimize one work file, write the requested artifacts and return its summary"""
+    started = time.perf_counter()
+    timings = {}
+
+    def lap(stage, since):
+        now = time.perf_counter()
+        timings[stage] = round(now - since, 3)
+        return now
+
+    base_filename = os.path.splitext(os.path.basename(input_file))[0]
+    output_base = os.path.join(os.path.abspath(args.output_dir), base_filename)
+    use_cache = not args.no_cache
+
+    data_cleaned = co.load_demand(input_file, use_cache=use_cache)
+    index = co.ProfileIndex(data_cleaned)
+    mark = lap('load', started)
+    results = co.optimize_cutting(data_cleaned, settings_df, default_length, args.mode, args.kerf,
+                                  args.trim_start, args.trim_end, args.workers, index, use_cache=use_cache)
+    mark = lap('optimize', mark)
+
+    waste_stats = co.calculate_waste_percentage(results)
+    weight_stats = co.calculate_weight_stats(data_cleaned, index)
+    total_weight = sum(weight_stats.values())
+    adjusted_weight = total_weight * (1 + args.weight_error / 100)
+    mark = lap('statistics', mark)
+
+    written = []
+    plan_pages = None
+    if 'plan-image' in args.artifacts:
+        plan_dir = f'{output_base}_cutting_plan'
+        plan_pages = co.draw_cutting_plan_pages(results, plan_dir, workers=args.workers)
+        written.append(os.path.join(plan_dir, 'index.json'))
+        written.extend(page['path'] for entry in plan_pages for page in entry['pages'])
+    if 'plan-excel' in args.artifacts:
+        co.export_to_excel(results, output_base, None, args.language, plan_pages)
+        written.append(f'{output_base}_cutting_plan.xlsx')
+    if 'invoice-excel' in args.artifacts:
+        # The exporter appends _facture itself
+        co.export_invoice_excel(results, weight_stats, total_weight, adjusted_weight, args.steel_price,
+                                args.weight_error, f'{output_base}.xlsx', args.language)
+        written.append(f'{output_base}_facture.xlsx')
+    if 'invoice-pdf' in args.artifacts:
+        path = f'{output_base}_facture.pdf'
+        co.export_invoice_pdf(results, weight_stats, total_weight, adjusted_weight, args.steel_price,
+                              args.weight_error, path, args.language, plan_pages)
+        written.append(path)
+    if 'plan-svg' in args.artifacts:
+        path = f'{output_base}_cutting_plan.svg'
+        plan_render.write_plan_svg(results, path)
+        written.append(path)
+    if 'plan-pdf' in args.artifacts:
+        path = f'{output_base}_cutting_plan.pdf'
+        plan_render.write_plan_pdf(results, path)
+        written.append(path)
+    lap('export', mark)
+
+    total_stock = sum(stats['total_stock'] for stats in waste_stats.values())
+    used_length = sum(stats['used_length'] for stats in waste_stats.values())
+    return {
+        'file': input_file,
+        'status': 'ok',
+        'profiles': len(results),
+        'bars': sum(len(stock_used) for _, _, stock_used in results),
+        'waste_percentage': round((total_stock - used_length) / total_stock * 100, 2) if total_stock else 0.0,
+        'total_weight': round(total_weight, 3),
+        'adjusted_weight': round(adjusted_weight, 3),
+        'price': round(adjusted_weight * args.steel_price, 2),
+        'outputs': written,
+        'seconds': round(time.perf_counter() - started, 3),
+        'timings': timings
+    }
+
+
+def process_file(input_file, settings_df, default_length, args):
+    """run_file that reports a failure in the summary instead of raising"""
+    started = time.perf_counter()
+    try:
+        return run_file(input_file, settings_df, default_length, args)
+    except Exception as e:
+        return {
+            'file': input_file,
+            'status': 'failed',
+            'error': str(e),
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+
+
+def _init_worker(artifacts):
+    """Per-process setup, paid once by each long-lived batch worker"""
+    co.register_fonts()
+    if not co.translations:
+        co.translations = co.load_translations()
+    if 'plan-image' in artifacts:
+        # Imported for its side effect: draw_cutting_plan then finds it loaded
+        import matplotlib.figure
+
+
+def expand_work_files(patterns):
+    """Expand directories and glob patterns into work files, in order and without duplicates"""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(
+                os.path.join(pattern, name) for name in os.listdir(pattern)
+                # Skip Excel's ~$ lock files
+                if name.lower().endswith(WORK_FILE_EXTENSIONS) and not name.startswith('~$')
+            )
+        elif any(char in pattern for char in '*?['):
+            matches = sorted(glob.glob(pattern))
+        else:
+            matches = [pattern]
+        files.extend(matches)
+    return list(dict.fromkeys(files))
+
+
+def write_manifest(path, summaries, started_at, seconds, args):
+    """Write the batch summary: options, per-file results and totals"""
+    succeeded = [summary for summary in summaries if summary['status'] == 'ok']
+    manifest = {
+        'started': started_at,
+        'seconds': round(seconds, 3),
+        'options': {
+            'mode': args.mode,
+            'kerf': args.kerf,
+            'trim_start': args.trim_start,
+            'trim_end': args.trim_end,
+            'weight_error': args.weight_error,
+            'steel_price': args.steel_price,
+            'language': args.language,
+            'artifacts': args.artifacts,
+            'jobs': args.jobs
+        },
+        'totals': {
+            'files': len(summaries),
+            'failed': len(summaries) - len(succeeded),
+            'bars': sum(summary['bars'] for summary in succeeded),
+            'total_weight': round(sum(summary['total_weight'] for summary in succeeded), 3),
+            'adjusted_weight': round(sum(summary['adjusted_weight'] for summary in succeeded), 3),
+            'price': round(sum(summary['price'] for summary in succeeded), 2)
+        },
+        'files': summaries
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+
+def print_summary(summary):
+    if summary['status'] != 'ok':
+        print(f"{summary['file']}: FAILED: {summary['error']}", file=sys.stderr)
+        return
+    print(f"{summary['file']}: {summary['profiles']} profiles, {summary['bars']} bars, "
+          f"waste {summary['waste_percentage']}%, {summary['total_weight']} kg, {summary['seconds']}s")
+
+
+def main(argv=None):
+    """Run the work files, serially or with --jobs workers; the exit code is 1 if any of them failed"""
+    args = parse_args(argv)
+
+    settings_df, default_length = pd.DataFrame({'Profile': [], 'Stock Length': []}), None
+    if args.settings:
+        settings_df, default_length = co.load_settings(args.settings)
+    if args.default_length is not None:
+        default_length = args.default_length
+    if default_length is None:
+        default_length = DEFAULT_LENGTH
+
+    work_files = expand_work_files(args.work_files)
+    if not work_files:
+        print("No work files found", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    started_at = datetime.datetime.now().isoformat(timespec='seconds')
+    started = time.perf_counter()
+    summaries = {}
+    if args.jobs > 1 and len(work_files) > 1:
+        # Files already run in parallel, so each one packs its profiles serially
+        args.workers = 1
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=_init_worker,
+                                 initargs=(args.artifacts,)) as executor:
+            futures = {
+                executor.submit(process_file, input_file, settings_df, default_length, args): input_file
+                for input_file in work_files
+            }
+            for future in as_completed(futures):
+                summaries[futures[future]] = future.result()
+                print_summary(summaries[futures[future]])
+    else:
+        for input_file in work_files:
+            summaries[input_file] = process_file(input_file, settings_df, default_length, args)
+            print_summary(summaries[input_file])
+
+    ordered = [summaries[input_file] for input_file in work_files]
+    write_manifest(args.manifest or os.path.join(args.output_dir, 'manifest.json'), ordered, started_at,
+                   time.perf_counter() - started, args)
+    return 1 if any(summary['status'] != 'ok' for summary in ordered) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,38 +1,58 @@
 import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
 import os
-import xlsxwriter
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.units import mm
 import datetime
 import json
-from reportlab.lib.fonts import addMapping
 import sys
+import csv
+import codecs
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+import packing
+import cache
 
-# Register Arabic fonts with full embedding
-try:
-    # Register the Arabic fonts
-    pdfmetrics.registerFont(TTFont('Arabic', 'fonts/NotoSansArabic-Regular.ttf', validate=True))
-    pdfmetrics.registerFont(TTFont('Arabic-Bold', 'fonts/NotoSansArabic-Bold.ttf', validate=True))
+# Fonts and translations ship next to this module, so it also works when
+# run from another directory (e.g. the command-line runner under cron)
+RESOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# openpyxl, xlsxwriter, reportlab and matplotlib are imported inside the
+# functions that use them, so importing co (and starting the GUI) stays cheap
+
+_fonts_registered = False
+
+def register_fonts():
+    """Register the Arabic fonts with full embedding, once per process.
+
+    Only Arabic invoices need them, so export_invoice_pdf calls this on first use.
+    """
+    global _fonts_registered
+    if _fonts_registered:
+        return
+    _fonts_registered = True
     
-    # Add font mapping
-    addMapping('Arabic', 0, 0, 'Arabic')  # normal
-    addMapping('Arabic', 1, 0, 'Arabic-Bold')  # bold
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.lib.fonts import addMapping
     
-    print("Arabic fonts registered successfully")
-except Exception as e:
-    print(f"Warning: Error loading Arabic fonts: {str(e)}")
-    print("Using fallback fonts.")
+    try:
+        # Register the Arabic fonts
+        pdfmetrics.registerFont(TTFont('Arabic', os.path.join(RESOURCE_DIR, 'fonts', 'NotoSansArabic-Regular.ttf'), validate=True))
+        pdfmetrics.registerFont(TTFont('Arabic-Bold', os.path.join(RESOURCE_DIR, 'fonts', 'NotoSansArabic-Bold.ttf'), validate=True))
+        
+        # Add font mapping
+        addMapping('Arabic', 0, 0, 'Arabic')  # normal
+        addMapping('Arabic', 1, 0, 'Arabic-Bold')  # bold
+        
+        print("Arabic fonts registered successfully")
+    except Exception as e:
+        print(f"Warning: Error loading Arabic fonts: {str(e)}")
+        print("Using fallback fonts.")
 
 # Load translations at module level
 def load_translations():
     try:
-        with open('translations.json', 'r', encoding='utf-8') as f:
+        with open(os.path.join(RESOURCE_DIR, 'translations.json'), 'r', encoding='utf-8') as f:
             return json.load(f)
     except Exception as e:
         print(f"Error loading translations: {str(e)}")
@@ -51,23 +71,8 @@ def load_data(file_path):
         if file_extension in ['xlsx', 'xls']:
             data = pd.read_excel(file_path, engine='openpyxl')
         elif file_extension == 'csv':
-            # Try different encodings and delimiters
-            encodings = ['utf-8', 'latin1', 'iso-8859-1']
-            delimiters = [',', ';', '\t']
-            
-            for encoding in encodings:
-                for delimiter in delimiters:
-                    try:
-                        data = pd.read_csv(file_path, encoding=encoding, sep=delimiter)
-                        print(f"DEBUG: Successfully read CSV with encoding {encoding} and delimiter {delimiter}")
-                        break
-                    except Exception as e:
-                        continue
-                if 'data' in locals():
-                    break
-                    
-            if 'data' not in locals():
-                raise Exception("Could not read CSV file with any combination of encoding and delimiter")
+            encoding, delimiter = _sniff_csv(file_path)
+            data = pd.read_csv(file_path, encoding=encoding, sep=delimiter)
         else:
             raise Exception(f"Unsupported file format: {file_extension}")
             
@@ -80,154 +85,653 @@ def load_data(file_path):
         print(f"Error message: {str(e)}")
         raise Exception(f"Error loading file {file_path}: {str(e)}")
 
+# Accepted spellings of every column the optimizer needs (French and English)
+COLUMN_ALIASES = {
+    'Profil': ['Profil', 'Profile', 'PROFIL'],
+    'Qté': ['Qté', 'Qty', 'Quantité', 'QTE', 'QTÉ'],
+    'Long.': ['Long.', 'Length', 'LONG.'],
+    'Poids': ['Poids', 'Weight', 'POIDS']
+}
+
+CLEAN_COLUMNS = ['Profil', 'Qté', 'Long.', 'Poids', 'Pds Tot']
+
+# Bump whenever clean_data/load_demand change what they produce, so
+# tables cached by an older version are not reused
+DEMAND_PARSER_VERSION = 1
+
+def _resolve_columns(labels, aliases=COLUMN_ALIASES):
+    """Map each expected column to its position in labels, or None if one is missing"""
+    labels = [str(label) for label in labels]
+    positions = {}
+    for expected, possibilities in aliases.items():
+        found = [labels.index(col) for col in possibilities if col in labels]
+        if not found:
+            return None
+        positions[expected] = found[0]
+    return positions
+
+def _find_header(data, max_rows=30, aliases=COLUMN_ALIASES):
+    """Locate the header when it is not the first line (title/date rows above it)"""
+    positions = _resolve_columns(data.columns, aliases)
+    if positions is not None:
+        return 0, positions
+    for i, row in enumerate(data.head(max_rows).itertuples(index=False)):
+        positions = _resolve_columns(row, aliases)
+        if positions is not None:
+            return i + 1, positions
+    raise Exception(f"Missing required columns {list(aliases)}, found {data.columns.tolist()}")
+
 def clean_data(data):
-    """Clean and prepare the data"""
+    """Normalize a work file into the columns the optimizer expects.
+
+    This is the one cleaning stage shared by the GUI and main(). Column
+    aliases are resolved once (the header may sit below title rows), each
+    column is coerced once, and the result uses compact dtypes: categorical
+    Profil, int32 Qté/Long., float32 Poids. Pds Tot is computed from the
+    full-precision weight so totals match the work file.
+    """
     try:
-        # Debug: Print initial data info
-        print("\nDEBUG: Data Info:")
-        print("Shape:", data.shape)
-        print("Columns:", data.columns.tolist())
-        print("\nFirst few rows:")
-        print(data.head())
-        
-        # Map expected column names (handles both French and English)
-        column_mapping = {
-            'Profil': ['Profil', 'Profile', 'PROFIL'],
-            'Qté': ['Qté', 'Qty', 'Quantité', 'QTE', 'QTÉ'],
-            'Long.': ['Long.', 'Length', 'LONG.'],
-            'Poids': ['Poids', 'Weight', 'POIDS']
-        }
+        # Already normalized (e.g. the GUI's copy handed to main): nothing to do
+        if list(data.columns) == CLEAN_COLUMNS and isinstance(data['Profil'].dtype, pd.CategoricalDtype):
+            return data
         
-        # Debug: Print column search process
-        print("\nDEBUG: Searching for columns:")
-        actual_columns = {}
-        for expected, possibilities in column_mapping.items():
-            print(f"\nLooking for {expected} in possibilities: {possibilities}")
-            found = False
-            for col in possibilities:
-                if col in data.columns:
-                    actual_columns[expected] = col
-                    print(f"Found: {col}")
-                    found = True
-                    break
-            if not found:
-                print(f"WARNING: Could not find column {expected}")
-                print(f"Available columns: {data.columns.tolist()}")
-                raise Exception(f"Missing required column {expected}")
-        
-        # Extract and rename columns
-        data_cleaned = data[[
-            actual_columns['Profil'],
-            actual_columns['Qté'],
-            actual_columns['Long.'],
-            actual_columns['Poids']
-        ]].copy()
-        
-        # Rename columns
-        data_cleaned.columns = ['Profil', 'Qté', 'Long.', 'Poids']
+        first_row, positions = _find_header(data)
+        raw = data.iloc[first_row:, list(positions.values())]
+        raw.columns = list(positions)
         
         # Remove rows with NaN values and 'Total' rows
-        data_cleaned = data_cleaned.dropna(subset=['Profil', 'Qté', 'Long.'])
-        data_cleaned = data_cleaned[~data_cleaned['Profil'].str.contains('Total', na=False)]
+        raw = raw[raw['Profil'].notna() & raw['Qté'].notna() & raw['Long.'].notna()]
+        profile = raw['Profil'].astype(str).astype('category')
+        categories = profile.cat.categories
+        keep = ~profile.isin(categories[categories.str.contains('Total')])
         
-        # Convert to proper types
-        data_cleaned['Qté'] = pd.to_numeric(data_cleaned['Qté'], errors='coerce').fillna(1).astype(int)
-        data_cleaned['Long.'] = pd.to_numeric(data_cleaned['Long.'], errors='coerce').fillna(0).astype(int)
-        data_cleaned['Poids'] = pd.to_numeric(data_cleaned['Poids'], errors='coerce').fillna(0).astype(float)
+        qty = pd.to_numeric(raw['Qté'], errors='coerce').fillna(1)[keep]
+        length = pd.to_numeric(raw['Long.'], errors='coerce').fillna(0)[keep]
+        weight = pd.to_numeric(raw['Poids'], errors='coerce').fillna(0)[keep]
         
-        # Calculate Pds Tot
-        data_cleaned['Pds Tot'] = data_cleaned['Qté'] * data_cleaned['Poids']
-        
-        print("\nDEBUG: Final cleaned data with calculated total weight:")
-        print(data_cleaned.head())
+        data_cleaned = pd.DataFrame({
+            'Profil': profile[keep].cat.remove_unused_categories(),
+            'Qté': qty.astype(np.int32),
+            'Long.': length.astype(np.int32),
+            'Poids': weight.astype(np.float32),
+            'Pds Tot': qty.astype(np.int32) * weight
+        })
         
         return data_cleaned
         
     except Exception as e:
-        print("\nERROR in clean_data:")
-        print(f"Error message: {str(e)}")
-        print("Full data columns:", data.columns.tolist())
+        print(f"Error cleaning data: {str(e)}")
         raise Exception(f"Error cleaning data: {str(e)}")
 
-def get_stock_length(profile, settings_df, default_length):
-    """Get stock length for a profile from settings DataFrame"""
-    length_row = settings_df[settings_df['Profile'] == profile]
-    if not length_row.empty:
-        return length_row['Stock Length'].iloc[0]
-    return default_length
-
-def optimize_cutting(data, settings_df, default_length):
-    results = []
-    
-    # Process each unique profile
-    for profile in settings_df['Profile'].unique():
-        # Get stock length for this profile
-        stock_length = settings_df[settings_df['Profile'] == profile]['Stock Length'].iloc[0]
-        
-        # Get all pieces for this profile
-        profile_data = data[data['Profil'] == profile]
-        
-        pieces = []
-        if not profile_data.empty:
-            # Collect all pieces with their quantities
-            for _, row in profile_data.iterrows():
-                pieces.extend([int(row['Long.'])] * int(row['Qté']))
-        
-        if pieces:  # Only process if we have pieces to cut
-            pieces.sort(reverse=True)  # Sort pieces in descending order
-            stock_used = []
-            current_stock = stock_length
-            current_pieces = []
-
-            for piece in pieces:
-                if piece <= current_stock:
-                    current_pieces.append(piece)
-                    current_stock -= piece
-                else:
-                    if current_pieces:
-                        stock_used.append((current_pieces, stock_length - current_stock))
-                    current_pieces = [piece]
-                    current_stock = stock_length - piece
-
-            if current_pieces:
-                stock_used.append((current_pieces, stock_length - current_stock))
-            
-            results.append((profile, stock_length, stock_used))
+def group_demand(data_cleaned):
+    """Aggregate cleaned rows into one row per (profile, length).
+
+    The result keeps clean_data's columns (Poids is the first unit weight
+    seen), so it can be passed anywhere cleaned data is expected.
+    """
+    return data_cleaned.groupby(['Profil', 'Long.'], observed=True, sort=False).agg(
+        **{
+            'Qté': ('Qté', 'sum'),
+            'Poids': ('Poids', 'first'),
+            'Pds Tot': ('Pds Tot', 'sum')
+        }
+    ).reset_index()[CLEAN_COLUMNS]
+
+def _sniff_csv(file_path, sample_size=64 * 1024):
+    """Detect encoding and delimiter once from the start of a CSV file"""
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+    
+    try:
+        # Incremental decoding tolerates a character cut at the sample's end
+        text = codecs.getincrementaldecoder('utf-8-sig')().decode(sample, final=False)
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError:
+        text = sample.decode('latin1')
+        encoding = 'latin1'
+    
+    try:
+        delimiter = csv.Sniffer().sniff(text, delimiters=',;\t').delimiter
+    except csv.Error:
+        # Title rows can confuse the sniffer, fall back to the most common one
+        delimiter = max([',', ';', '\t'], key=text.count)
+    return encoding, delimiter
+
+def _iter_csv_chunks(file_path, chunk_size):
+    encoding, delimiter = _sniff_csv(file_path)
+    
+    # Title rows above the header can be ragged, so look for it with csv first
+    header_row = 0
+    with open(file_path, encoding=encoding, newline='') as f:
+        for i, row in zip(range(30), csv.reader(f, delimiter=delimiter)):
+            if _resolve_columns(row) is not None:
+                header_row = i
+                break
+    
+    yield from pd.read_csv(file_path, encoding=encoding, sep=delimiter, skiprows=header_row,
+                           chunksize=chunk_size)
+
+def _iter_excel_chunks(file_path, chunk_size):
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        for _, row in zip(range(30), rows):
+            if _resolve_columns(row) is not None:
+                header = [str(label) for label in row]
+                break
+        else:
+            raise Exception(f"Missing required columns {list(COLUMN_ALIASES)}")
+        
+        width = len(header)
+        buffer = []
+        for row in rows:
+            buffer.append(row[:width])
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=header)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=header)
+    finally:
+        workbook.close()
+
+def _input_cache():
+    return cache.InputCache(os.path.join(get_app_data_dir(), 'cache', 'demand'))
+
+def load_demand(file_path, chunk_size=100_000, use_cache=True):
+    """Stream a work file and return its demand aggregated per (profile, length).
+
+    CSV files are read with pandas chunksize and Excel files row by row in
+    openpyxl read-only mode. Every chunk is cleaned and grouped, then merged
+    into the running totals, so peak memory follows the chunk size and the
+    number of distinct items rather than the file size. The result has
+    clean_data's columns and can go straight to main().
+    With use_cache, an unchanged file is served from the on-disk input
+    cache without being parsed again.
+    """
+    try:
+        if use_cache:
+            input_cache = _input_cache()
+            key = input_cache.key(file_path, DEMAND_PARSER_VERSION)
+            cached = input_cache.load(key)
+            if cached is not None:
+                return cached
+        
+        file_extension = file_path.lower().split('.')[-1]
+        if file_extension in ['xlsx', 'xls']:
+            chunks = _iter_excel_chunks(file_path, chunk_size)
+        elif file_extension == 'csv':
+            chunks = _iter_csv_chunks(file_path, chunk_size)
+        else:
+            raise Exception(f"Unsupported file format: {file_extension}")
+        
+        demand = pd.DataFrame({column: [] for column in CLEAN_COLUMNS})
+        for chunk in chunks:
+            part = group_demand(clean_data(chunk))
+            demand = group_demand(pd.concat([demand, part], ignore_index=True)) if len(demand) else part
+        
+        demand = demand.astype({
+            'Profil': 'category',
+            'Qté': np.int32,
+            'Long.': np.int32,
+            'Poids': np.float32,
+            'Pds Tot': np.float64
+        })
+        
+        if use_cache:
+            try:
+                input_cache.store(key, demand)
+            except OSError as e:
+                print(f"Warning: could not cache parsed input: {str(e)}")
+        return demand
+        
+    except Exception as e:
+        print(f"Error streaming {file_path}: {str(e)}")
+        raise Exception(f"Error loading file {file_path}: {str(e)}")
+
+class ProfileIndex:
+    """Per-profile lookups over cleaned data, built once with a single groupby.
+
+    Rows are aggregated per (profile, length) and each profile maps to the
+    positions of its rows, so optimize_cutting and calculate_weight_stats
+    never rescan the whole table with a boolean mask per profile.
+    """
+
+    def __init__(self, data_cleaned):
+        self.demand = group_demand(data_cleaned)
+        self.rows = self.demand.groupby('Profil', observed=True, sort=False).indices
+        self._lengths = self.demand['Long.'].to_numpy()
+        self._counts = self.demand['Qté'].to_numpy()
+        self._weights = self.demand['Pds Tot'].to_numpy()
+        self._empty = np.array([], dtype=np.int64)
+
+    def profiles(self):
+        """Profiles in order of first appearance"""
+        return list(self.rows)
+
+    def demand_for(self, profile):
+        """(lengths, counts) arrays of one profile"""
+        rows = self.rows.get(profile, self._empty)
+        return self._lengths[rows], self._counts[rows]
+
+    def total_weight(self, profile):
+        return float(self._weights[self.rows.get(profile, self._empty)].sum())
+
+def stock_length_index(settings_df):
+    """Map each profile to its stock length (first settings row wins)"""
+    first_rows = settings_df.drop_duplicates('Profile')
+    return dict(zip(first_rows['Profile'], first_rows['Stock Length']))
+
+# Accepted spellings of the stock length sheet's columns
+SETTINGS_ALIASES = {
+    'Profile': ['Profile', 'Profil', 'Profile Stock', 'PROFIL'],
+    'Stock Length': ['Stock Length', 'Stock length', 'Long. Stock', 'Longueur Stock']
+}
+
+def load_settings(file_path):
+    """Load per-profile stock lengths from an ODS/Excel/CSV sheet or a JSON file.
+
+    Sheets need a profile and a stock length column (title rows above the
+    header are skipped); JSON maps profile names to lengths. A "Default"
+    profile sets the default stock length. Returns a settings DataFrame
+    for optimize_cutting and the default length, or None if there is none.
+    """
+    try:
+        file_extension = file_path.lower().split('.')[-1]
+        
+        if file_extension == 'json':
+            with open(file_path, 'r', encoding='utf-8') as f:
+                lengths = json.load(f)
+            table = pd.DataFrame({'Profile': list(lengths), 'Stock Length': list(lengths.values())})
+        else:
+            if file_extension == 'ods':
+                # Needs the optional odfpy package
+                raw = pd.read_excel(file_path, engine='odf')
+            elif file_extension in ['xlsx', 'xls']:
+                raw = pd.read_excel(file_path, engine='openpyxl')
+            elif file_extension == 'csv':
+                encoding, delimiter = _sniff_csv(file_path)
+                raw = pd.read_csv(file_path, encoding=encoding, sep=delimiter)
+            else:
+                raise Exception(f"Unsupported file format: {file_extension}")
+            first_row, positions = _find_header(raw, aliases=SETTINGS_ALIASES)
+            table = raw.iloc[first_row:, list(positions.values())]
+            table.columns = list(positions)
+        
+        profile = table['Profile'].astype(str).str.strip()
+        stock_length = pd.to_numeric(table['Stock Length'], errors='coerce')
+        keep = table['Profile'].notna() & stock_length.notna()
+        profile, stock_length = profile[keep], stock_length[keep].astype(int)
+        
+        is_default = profile.str.lower() == 'default'
+        default_length = int(stock_length[is_default].iloc[0]) if is_default.any() else None
+        settings_df = pd.DataFrame({
+            'Profile': profile[~is_default].tolist(),
+            'Stock Length': stock_length[~is_default].tolist()
+        })
+        return settings_df, default_length
+        
+    except Exception as e:
+        print(f"Error loading settings: {str(e)}")
+        raise Exception(f"Error loading settings {file_path}: {str(e)}")
+
+def get_stock_length(profile, settings, default_length):
+    """Get stock length for a profile from a stock_length_index() dict or settings DataFrame"""
+    if isinstance(settings, pd.DataFrame):
+        settings = stock_length_index(settings)
+    return settings.get(profile, default_length)
+
+class OptimizationCancelled(Exception):
+    """Raised when the caller's cancelled() check asks the pipeline to stop"""
+
+def _checkpoint(cancelled):
+    if cancelled is not None and cancelled():
+        raise OptimizationCancelled()
+
+# Plans of recent runs, reused when a profile's demand and settings are
+# unchanged; set RESULT_CACHE.directory to keep them on disk as well
+RESULT_CACHE = cache.ResultCache()
+
+def optimize_cutting(data, settings_df, default_length, mode="ffd", kerf=0, trim_start=0, trim_end=0, workers=1,
+                     index=None, use_cache=True, progress=None, cancelled=None):
+    """Pack each profile's pieces into stock bars.
+
+    Every profile in data is packed, in order of first appearance, on its
+    stock length from settings_df or else on default_length.
+    mode selects the packing engine from packing.ENGINES: "ffd", "bfd" or
+    "optimal" (column generation, reports an LP lower bound per profile).
+    kerf is the blade width lost per cut, trim_start/trim_end the length cut
+    off each end of a bar before use (all in mm). Pieces longer than a bar
+    minus its trims get a bar each and are reported with a warning.
+    workers > 1 packs profiles in that many processes (None = one per CPU);
+    results come back in the same order as the serial path.
+    Returns (profile, stock_length, stock_used) tuples, stock_used being the
+    packing.StockUsage that the exporters read.
+    index is a ProfileIndex of data, built here when not given.
+    With use_cache, profiles whose demand, stock length, kerf, trims and
+    mode match an earlier run are served from RESULT_CACHE and only the
+    others are packed.
+    progress(done, total, profile) is called as each profile is packed and
+    cancelled() is polled between profiles; when it returns True the run
+    stops with OptimizationCancelled.
+    """
+    if index is None:
+        index = ProfileIndex(data)
+    tasks = []
+    lookup = stock_length_index(settings_df)
+    
+    # Process each unique profile; those missing from the settings use default_length
+    for profile in index.profiles():
+        # Demand as (length, count) pairs, never expanded into single pieces
+        lengths, counts = index.demand_for(profile)
+        
+        if counts.sum() > 0:  # Only process if we have pieces to cut
+            tasks.append((profile, int(get_stock_length(profile, lookup, default_length)), lengths, counts))
+    
+    usages = [None] * len(tasks)
+    keys = [None] * len(tasks)
+    if use_cache:
+        for i, (_, stock_length, lengths, counts) in enumerate(tasks):
+            keys[i] = RESULT_CACHE.key(lengths, counts, stock_length, mode, kerf, trim_start, trim_end,
+                                       packing.ENGINE_VERSION)
+            usages[i] = RESULT_CACHE.get(keys[i])
+    pending = [i for i, usage in enumerate(usages) if usage is None]
+    done = len(tasks) - len(pending)
+    
+    def finished(i, usage):
+        nonlocal done
+        usages[i] = usage
+        if use_cache:
+            RESULT_CACHE.put(keys[i], usage)
+        done += 1
+        if progress is not None:
+            progress(done, len(tasks), tasks[i][0])
+    
+    if workers == 1 or len(pending) < 2:
+        for i in pending:
+            _checkpoint(cancelled)
+            finished(i, packing.pack(tasks[i][2], tasks[i][3], tasks[i][1], mode, kerf, trim_start, trim_end))
+    else:
+        _pack_in_pool([tasks[i] for i in pending], mode, kerf, trim_start, trim_end, workers,
+                      lambda j, usage: finished(pending[j], usage), cancelled)
+    if use_cache and pending:
+        # One directory scan for the whole run rather than one per profile
+        RESULT_CACHE.evict()
+    
+    for (profile, stock_length, _, _), stock_used in zip(tasks, usages):
+        oversized = getattr(stock_used, 'oversized', 0)
+        if oversized:
+            print(f"Warning: {profile}: {oversized} piece(s) longer than the usable bar length "
+                  f"({stock_length - trim_start - trim_end:g} mm) cut from a bar each, overfilling it")
+    
+    return [(profile, stock_length, stock_used)
+            for (profile, stock_length, _, _), stock_used in zip(tasks, usages)]
+
+def _pack_in_pool(tasks, mode, kerf, trim_start, trim_end, workers, finished, cancelled=None):
+    """Pack profiles in a process pool, largest first so no profile straggles.
+
+    finished(i, usage) is called for tasks[i] as each result arrives.
+    """
+    # Distinct lengths drive the engines' cost, total quantity breaks ties
+    order = sorted(range(len(tasks)), key=lambda i: (-len(tasks[i][2]), -int(tasks[i][3].sum()), i))
     
-    return results
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for i in order:
+            _, stock_length, lengths, counts = tasks[i]
+            future = executor.submit(packing.pack, lengths, counts, stock_length, mode, kerf, trim_start, trim_end)
+            futures[future] = i
+        for future in as_completed(futures):
+            if cancelled is not None and cancelled():
+                # Drop queued profiles; the pool only waits for running ones
+                for pending in futures:
+                    pending.cancel()
+                raise OptimizationCancelled()
+            finished(futures[future], future.result())
+
+def _cut_patterns(stock_used):
+    """(pieces, used, repeat) for each cut pattern of a packing.StockUsage, in bar order"""
+    return [(pattern.pieces, pattern.used, pattern.repeat) for pattern in stock_used.patterns]
+
+def _piece_offsets(pieces, kerf=0, trim_start=0):
+    """Left edge of every piece along its bar, after the start trim and a kerf per cut"""
+    step = np.asarray(pieces, dtype=np.float64) + kerf
+    return trim_start + np.cumsum(step) - step
+
+def _pieces_label(pieces):
+    """Compact text for the pieces of one bar, runs of equal lengths folded: '3 x 2500 + 1200'"""
+    runs = []
+    for piece in pieces:
+        if runs and runs[-1][0] == piece:
+            runs[-1][1] += 1
+        else:
+            runs.append([piece, 1])
+    return ' + '.join(
+        f"{count} x {length:g}" if count > 1 else f"{length:g}" for length, count in runs
+    )
+
+def _bar_layout(stock_used):
+    """Geometry of one profile's plan as NumPy arrays.
+
+    Returns (bars, consumed, piece_bar, piece_left, piece_width): the number
+    of bars, the length each bar consumes, and for every piece the bar it is
+    cut from, its offset and its length. Offsets are computed once per cut
+    pattern and repeated for its identical bars.
+    """
+    kerf = getattr(stock_used, 'kerf', 0)
+    trim_start = getattr(stock_used, 'trim_start', 0)
+    groups = _cut_patterns(stock_used)
+    
+    consumed, piece_bar, piece_left, piece_width = [], [], [], []
+    bar = 0
+    for pieces, used, repeat in groups:
+        pieces = np.asarray(pieces, dtype=np.float64)
+        left = _piece_offsets(pieces, kerf, trim_start)
+        consumed.append(np.full(repeat, used, dtype=np.float64))
+        piece_bar.append(np.repeat(np.arange(bar, bar + repeat), len(pieces)))
+        piece_left.append(np.tile(left, repeat))
+        piece_width.append(np.tile(pieces, repeat))
+        bar += repeat
+    
+    if not groups:
+        empty = np.array([], dtype=np.float64)
+        return 0, empty, empty, empty, empty
+    return (bar, np.concatenate(consumed), np.concatenate(piece_bar),
+            np.concatenate(piece_left), np.concatenate(piece_width))
+
+def _rectangles(left, bottom, width, height):
+    """(n, 4, 2) vertex array of axis-aligned rectangles, for a PolyCollection"""
+    left = np.asarray(left, dtype=np.float64)
+    right = left + width
+    bottom = np.broadcast_to(np.asarray(bottom, dtype=np.float64), left.shape)
+    top = bottom + height
+    return np.stack([
+        np.stack([left, bottom], axis=-1),
+        np.stack([right, bottom], axis=-1),
+        np.stack([right, top], axis=-1),
+        np.stack([left, top], axis=-1)
+    ], axis=1)
 
 def draw_cutting_plan(results, save_path):
-    """Draw cutting plan and save to AppData"""
+    """Draw cutting plan and save to AppData.
+
+    Each profile is drawn as two PolyCollections (stock bars and pieces)
+    built from NumPy arrays, so the number of matplotlib artists does not
+    grow with the number of bars.
+    """
+    # Imported here so runs that skip the image never load matplotlib
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import PolyCollection
+    
     try:
-        fig, axs = plt.subplots(len(results), figsize=(10, len(results) * 2))
+        # A standalone Agg figure keeps drawing headless and safe off the GUI thread
+        fig = Figure(figsize=(10, len(results) * 2))
+        FigureCanvasAgg(fig)
+        axs = fig.subplots(len(results))
         
         if len(results) == 1:
             axs = [axs]
         
-        for i, (profile, stock_length, stock_used) in enumerate(results):
-            for j, (pieces, total_used) in enumerate(stock_used):
-                axs[i].barh(y=j, width=stock_length, color='grey', edgecolor='black')
-                start = 0
-                for piece in pieces:
-                    axs[i].barh(y=j, width=piece, left=start, color='blue', edgecolor='black')
-                    start += piece
-                axs[i].set_xlim(0, stock_length)
-                axs[i].set_title(f'Profile {profile}: Piece {j+1}: Total Length Used = {total_used} mm, Remaining = {stock_length - total_used} mm')
-                axs[i].axis('off')
+        for ax, (profile, stock_length, stock_used) in zip(axs, results):
+            bars, consumed, piece_bar, piece_left, piece_width = _bar_layout(stock_used)
+            
+            # Same geometry as barh: height 0.8 centred on the bar index
+            stock = _rectangles(np.zeros(bars), np.arange(bars) - 0.4, stock_length, 0.8)
+            pieces = _rectangles(piece_left, piece_bar - 0.4, piece_width, 0.8)
+            ax.add_collection(PolyCollection(stock, facecolors='grey', edgecolors='black'))
+            ax.add_collection(PolyCollection(pieces, facecolors='blue', edgecolors='black'))
+            
+            total_used = consumed.sum()
+            ax.set_xlim(0, stock_length)
+            ax.set_ylim(-0.5, max(bars, 1) - 0.5)
+            ax.set_title(f'Profile {profile}: {bars} bars: Total Length Used = {total_used:g} mm, '
+                         f'Remaining = {bars * stock_length - total_used:g} mm')
+            ax.axis('off')
 
-        plt.tight_layout()
+        fig.tight_layout()
         
         # Ensure directory exists
         os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        plt.savefig(save_path)
-        plt.close()
+        fig.savefig(save_path)
         
     except Exception as e:
         print(f"Error drawing cutting plan: {str(e)}")
         raise
 
-def export_to_excel(results, base_filename, image_path, language="fr"):
-    """Export cutting plan to Excel"""
+# Bars per cutting-plan page; every page has the same size whatever its fill
+PLAN_PAGE_BARS = 25
+PLAN_PAGE_DPI = 100
+
+def _plan_page_size(bars_per_page):
+    """Figure size of a plan page, in inches"""
+    return 10, 1 + 0.3 * bars_per_page
+
+def _draw_plan_page(path, title, stock_length, first_bar, consumed, piece_bar, piece_left, piece_width,
+                    bars_per_page):
+    """Render one plan page to path; top-level so a process pool can run it"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import PolyCollection
+    
+    bars = len(consumed)
+    rows = np.arange(bars)
+    fig = Figure(figsize=_plan_page_size(bars_per_page), dpi=PLAN_PAGE_DPI)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    
+    stock = _rectangles(np.zeros(bars), rows - 0.4, stock_length, 0.8)
+    pieces = _rectangles(piece_left, piece_bar - first_bar - 0.4, piece_width, 0.8)
+    ax.add_collection(PolyCollection(stock, facecolors='grey', edgecolors='black'))
+    ax.add_collection(PolyCollection(pieces, facecolors='blue', edgecolors='black'))
+    
+    # First bar at the top, numbered as on the shop floor
+    ax.set_xlim(0, stock_length)
+    ax.set_ylim(bars_per_page - 0.5, -0.5)
+    ax.set_yticks(rows)
+    ax.set_yticklabels([str(first_bar + row + 1) for row in rows])
+    ax.set_xticks([])
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    ax.set_title(title)
+    
+    fig.tight_layout()
+    fig.savefig(path)
+
+def plan_page_jobs(results, output_dir, bars_per_page=PLAN_PAGE_BARS):
+    """Lay the cutting plan out in pages without drawing them.
+
+    Returns (index, jobs): the index described in draw_cutting_plan_pages,
+    and one _draw_plan_page argument tuple per page, for draw_plan_page_jobs.
+    """
+    width_px, height_px = (int(size * PLAN_PAGE_DPI) for size in _plan_page_size(bars_per_page))
+    index, jobs = [], []
+    
+    for i, (profile, stock_length, stock_used) in enumerate(results, start=1):
+        bars, consumed, piece_bar, piece_left, piece_width = _bar_layout(stock_used)
+        page_count = max(1, -(-bars // bars_per_page))
+        # Bars are numbered in order, so each page's pieces are one slice
+        bounds = np.searchsorted(piece_bar, np.arange(page_count + 1) * bars_per_page)
+        entry = {'profile': str(profile), 'stock_length': int(stock_length), 'bars': bars, 'pages': []}
+        
+        for page in range(page_count):
+            first, last = page * bars_per_page, min(bars, (page + 1) * bars_per_page)
+            lo, hi = bounds[page], bounds[page + 1]
+            path = os.path.join(output_dir, f'profile_{i:03d}_page_{page + 1:03d}.png')
+            title = (f'Profile {profile}: bars {first + 1}-{last} of {bars} '
+                     f'(page {page + 1}/{page_count})')
+            jobs.append((path, title, stock_length, first, consumed[first:last], piece_bar[lo:hi],
+                         piece_left[lo:hi], piece_width[lo:hi], bars_per_page))
+            entry['pages'].append({
+                'page': page + 1,
+                'first_bar': first + 1,
+                'last_bar': last,
+                'width_px': width_px,
+                'height_px': height_px,
+                'path': path
+            })
+        index.append(entry)
+    return index, jobs
+
+def draw_plan_page_jobs(jobs):
+    """Draw a batch of pages from plan_page_jobs"""
+    for job in jobs:
+        _draw_plan_page(*job)
+
+def write_plan_index(index, output_dir, *drawn):
+    """Write output_dir/index.json once the pages are drawn and return the index.
+
+    drawn is ignored; run_exports passes the page batches' results there.
+    """
+    # The index on disk names pages relative to itself
+    stored = [
+        dict(entry, pages=[
+            {key: (os.path.basename(value) if key == 'path' else value) for key, value in page.items()}
+            for page in entry['pages']
+        ])
+        for entry in index
+    ]
+    with open(os.path.join(output_dir, 'index.json'), 'w', encoding='utf-8') as f:
+        json.dump(stored, f, indent=2, ensure_ascii=False)
+    return index
+
+def draw_cutting_plan_pages(results, output_dir, bars_per_page=PLAN_PAGE_BARS, workers=1):
+    """Render the cutting plan as fixed-size PNG pages of bars_per_page bars.
+
+    Each profile gets its own pages, written to output_dir as
+    profile_<n>_page_<m>.png, and output_dir/index.json lists them. Returns
+    the same index: per profile its stock length, bar count and pages, each
+    page with its bar range, pixel size and path. With workers > 1 (None =
+    one per CPU) pages are rendered in a process pool.
+    """
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        index, jobs = plan_page_jobs(results, output_dir, bars_per_page)
+        if workers is None:
+            workers = os.cpu_count() or 1
+        
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for future in [executor.submit(_draw_plan_page, *job) for job in jobs]:
+                    future.result()
+        else:
+            draw_plan_page_jobs(jobs)
+        
+        return write_plan_index(index, output_dir)
+        
+    except Exception as e:
+        print(f"Error drawing cutting plan pages: {str(e)}")
+        raise
+
+def export_to_excel(results, base_filename, image_path, language="fr", plan_pages=None):
+    """Export cutting plan to Excel, with the plan image beside it unless image_path is None.
+
+    Rows are streamed bar by bar in xlsxwriter's constant_memory mode, with
+    the pieces of each bar as compact text such as '3 x 2500 + 1200'.
+    plan_pages, an index from draw_cutting_plan_pages, adds a sheet with
+    each profile's plan pages under its name instead.
+    """
 
     try:
         # Use script directory as default export location
@@ -250,30 +754,54 @@ def export_to_excel(results, base_filename, image_path, language="fr"):
             "remaining": t.get("Remaining Length", "Remaining Length")
         }
 
-        data_to_export = []
-        for profile, stock_length, stock_used in results:
-            for j, (pieces, remaining) in enumerate(stock_used):
-                data_to_export.append({
-                    columns["profile"]: profile,
-                    columns["stock_length"]: stock_length,
-                    columns["cut_index"]: j+1,
-                    columns["pieces_cut"]: pieces,
-                    columns["total_length"]: sum(pieces),
-                    columns["remaining"]: remaining
-                })
-
-        df = pd.DataFrame(data_to_export)
-        writer = pd.ExcelWriter(output_path, engine='xlsxwriter')
-        df.to_excel(writer, sheet_name=t.get("Cutting Plan", "Cutting Plan"), index=False)
-
-        workbook = writer.book
-        worksheet = writer.sheets[t.get("Cutting Plan", "Cutting Plan")]
-
+        import xlsxwriter
+        
+        # constant_memory flushes each row as soon as the next one starts, so
+        # rows must be written in order and memory stays flat however many bars
+        workbook = xlsxwriter.Workbook(output_path, {'constant_memory': True})
+        worksheet = workbook.add_worksheet(t.get("Cutting Plan", "Cutting Plan"))
         if language == "ar":
             worksheet.right_to_left()
-
-        worksheet.insert_image('H2', image_path)
-        writer._save()
+        
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        worksheet.write_row(0, 0, list(columns.values()), header_format)
+        
+        if image_path is not None:
+            worksheet.insert_image('H2', image_path)
+        
+        row = 1
+        for profile, stock_length, stock_used in results:
+            profile = str(profile)
+            cut_index = 1
+            for pieces, used, repeat in _cut_patterns(stock_used):
+                # Identical bars share their label and totals
+                label = _pieces_label(pieces)
+                total_length = float(sum(pieces))
+                remaining = stock_length - used
+                for _ in range(repeat):
+                    worksheet.write_string(row, 0, profile)
+                    worksheet.write_number(row, 1, stock_length)
+                    worksheet.write_number(row, 2, cut_index)
+                    worksheet.write_string(row, 3, label)
+                    worksheet.write_number(row, 4, total_length)
+                    worksheet.write_number(row, 5, remaining)
+                    row += 1
+                    cut_index += 1
+        
+        if plan_pages:
+            plans_sheet = workbook.add_worksheet(t.get("Plan Pages", "Plan Pages"))
+            if language == "ar":
+                plans_sheet.right_to_left()
+            bold = workbook.add_format({'bold': True})
+            row = 0
+            for entry in plan_pages:
+                plans_sheet.write(row, 0, f"{columns['profile']}: {entry['profile']} ({entry['bars']})", bold)
+                row += 1
+                for page in entry['pages']:
+                    plans_sheet.insert_image(row, 0, page['path'], {'x_scale': 0.5, 'y_scale': 0.5})
+                    # Default rows are 20 px high
+                    row += -(-page['height_px'] // 40) + 1
+        workbook.close()
 
         print(f"Excel exported to: {output_path}")
 
@@ -285,54 +813,79 @@ def calculate_waste_percentage(results):
     waste_stats = {}
     for profile, stock_length, stock_used in results:
         total_stock = len(stock_used) * stock_length
-        used_length = sum(sum(pieces) for pieces, _ in stock_used)
+        used_length = stock_used.used_length()
         waste_percentage = ((total_stock - used_length) / total_stock) * 100
         waste_stats[profile] = {
             'waste_percentage': round(waste_percentage, 2),
             'total_stock': total_stock,
-            'used_length': used_length
+            'used_length': used_length,
+            # Blade and trim loss, already part of the waste percentage
+            'kerf_loss': stock_used.consumed_length() - used_length
         }
+        
+        # Engines that prove a lower bound report how far the plan is from it
+        lower_bound = getattr(stock_used, 'lower_bound', None)
+        if lower_bound:
+            waste_stats[profile]['lower_bound'] = lower_bound
+            waste_stats[profile]['optimality_gap'] = round((len(stock_used) - lower_bound) / lower_bound * 100, 2)
     return waste_stats
 
-def calculate_weight_stats(data_df):
+def calculate_weight_stats(data_df, index=None):
     """Calculate weight statistics for each profile"""
+    if index is None:
+        index = ProfileIndex(data_df)
     weight_stats = {}
     
-    for profile in data_df['Profil'].unique():
-        profile_data = data_df[data_df['Profil'] == profile]
-        total_weight = profile_data['Pds Tot'].sum()
-        weight_stats[profile] = round(total_weight, 3)
+    for profile in index.profiles():
+        weight_stats[profile] = round(index.total_weight(profile), 3)
     
     return weight_stats
 
-def export_invoice_pdf(results, weight_stats, total_weight, adjusted_weight, steel_price, weight_error, output_path, language="fr"):
-    """Export a PDF invoice"""
-    try:
-        # Get translations for the current language
-        if language not in translations:
-            language = "en"
-            
+# Invoices with more rows than this are drawn straight on a canvas instead
+# of being laid out as a platypus table
+INVOICE_CANVAS_ROWS = 200
+
+class InvoiceTemplate:
+    """Styles and table layout of the PDF invoice in one language.
+
+    Building the styles costs more than filling a small invoice, so
+    invoice_template() keeps one per language for the whole process.
+    The draw_* methods lay the same table out directly on a canvas.
+    The table is split into pages of rows_per_page() rows, each with the
+    header and a closing subtotal or total rows.
+    """
+
+    COLUMN_WIDTHS_MM = (35, 25, 25, 20, 30, 25, 30)
+    PAGE_HEIGHT = 841.89  # A4, in points
+    MARGIN = 30
+    FRAME_PADDING = 6  # platypus frames pad their content on every side
+    TITLE_HEIGHT = 88  # title and date above the first page's table
+    HEADER_HEIGHT = 26
+    ROW_HEIGHT = 18
+    # Rows kept free at the foot of each page for the subtotal or the totals
+    FOOTER_ROWS = 2
+
+    def __init__(self, language):
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.lib.units import mm
+        from reportlab.platypus import TableStyle
+        
         t = translations[language].get("invoice", {})
         if not t:
             raise ValueError(f"Invoice translations not found for language: {language}")
-        
-        # Create PDF document with font embedding
-        pdf_path = output_path.replace('.xlsx', '_facture.pdf')
-        doc = SimpleDocTemplate(
-            pdf_path,
-            pagesize=A4,
-            rightMargin=30,
-            leftMargin=30,
-            topMargin=30,
-            bottomMargin=30,
-            encoding='UTF-8'  # Ensure UTF-8 encoding
-        )
+        self.language = language
+        self.t = t
+        self.colors = colors
         
         # Styles with RTL support
         styles = getSampleStyleSheet()
         if language == "ar":
+            register_fonts()
+            self.font, self.bold_font = 'Arabic', 'Arabic-Bold'
+            
             # Arabic styles with explicit font encoding
-            style_title = ParagraphStyle(
+            self.title_style = ParagraphStyle(
                 'CustomTitle',
                 parent=styles['Heading1'],
                 fontSize=16,
@@ -342,7 +895,7 @@ def export_invoice_pdf(results, weight_stats, total_weight, adjusted_weight, ste
                 spaceAfter=30,
                 encoding='UTF-8'
             )
-            normal_style = ParagraphStyle(
+            self.normal_style = ParagraphStyle(
                 'ArabicNormal',
                 parent=styles['Normal'],
                 fontName='Arabic',
@@ -350,60 +903,36 @@ def export_invoice_pdf(results, weight_stats, total_weight, adjusted_weight, ste
                 wordWrap='RTL',
                 encoding='UTF-8'
             )
-            
-            # Create table style with Arabic font
-            table_style = TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Arabic-Bold'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Arabic'),
-                ('FONTSIZE', (0, 0), (-1, 0), 11),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, -2), (-1, -1), colors.lightgrey),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('ALIGN', (0, -2), (-1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('BOX', (0, 0), (-1, -1), 2, colors.black),
-            ])
         else:
             # Default styles for other languages
-            style_title = ParagraphStyle(
+            self.font, self.bold_font = 'Helvetica', 'Helvetica-Bold'
+            self.title_style = ParagraphStyle(
                 'CustomTitle',
                 parent=styles['Heading1'],
                 fontSize=16,
                 spaceAfter=30,
                 alignment=1
             )
-            normal_style = styles['Normal']
-            table_style = TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 11),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, -2), (-1, -1), colors.lightgrey),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('ALIGN', (0, -2), (-1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('BOX', (0, 0), (-1, -1), 2, colors.black),
-            ])
-        
-        # Content elements
-        elements = []
-        
-        # Add title and date with proper RTL handling
-        elements.append(Paragraph(t["title"], style_title))
-        date_text = f"{t['date']}: {datetime.datetime.now().strftime('%d/%m/%Y')}"
-        elements.append(Paragraph(date_text, normal_style))
-        elements.append(Spacer(1, 20))
+            self.normal_style = styles['Normal']
         
-        # Prepare table data using translations
-        headers = [
+        page_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), self.bold_font),
+            ('FONTNAME', (0, 1), (-1, -1), self.font),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('BOX', (0, 0), (-1, -1), 2, colors.black),
+        ])
+        # Pages end with one shaded subtotal row, the last page with two total rows
+        self.page_style = TableStyle([('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey)], parent=page_style)
+        self.table_style = TableStyle([('BACKGROUND', (0, -2), (-1, -1), colors.lightgrey)], parent=page_style)
+        self.col_widths = [width * mm for width in self.COLUMN_WIDTHS_MM]
+        self.headers = [
             t["headers"]["type"],
             t["headers"]["weight_per_meter"],
             t["headers"]["stock_length"],
@@ -413,65 +942,252 @@ def export_invoice_pdf(results, weight_stats, total_weight, adjusted_weight, ste
             t["headers"]["total_price"]
         ]
         
-        data = [headers]
-        
-        # Add data rows
-        for result in results:
-            profile = result[0]
-            stock_length = result[1]
-            stock_used = result[2]
-            
-            qty = sum(len(pieces) for pieces, _ in stock_used)
-            profile_weight = weight_stats.get(profile, 0)
-            weight_per_unit = profile_weight/qty if qty > 0 else 0
-            percentage = profile_weight / total_weight if total_weight > 0 else 0
-            price = profile_weight * steel_price
-            
-            row = [
-                profile,
-                f"{weight_per_unit:.3f}",
-                f"{stock_length}",
-                f"{qty}",
-                f"{profile_weight:.3f}",
-                f"{percentage:.1%}",
-                f"{price:.3f}"
-            ]
-            data.append(row)
-        
-        # Add totals
-        total_price = total_weight * steel_price
-        adjusted_price = adjusted_weight * steel_price
-        adjusted_percentage = 1 + (weight_error/100)
-        
-        # Total row using translations
-        data.append([
-            t["total"],
+        # Column edges and centres for the canvas path
+        self.edges = [0]
+        for width in self.col_widths:
+            self.edges.append(self.edges[-1] + width)
+        self.centres = [(a + b) / 2 for a, b in zip(self.edges, self.edges[1:])]
+
+    def rows_per_page(self, first=False):
+        """Profile rows on a page of the table; the first page also holds the title"""
+        height = self.PAGE_HEIGHT - 2 * (self.MARGIN + self.FRAME_PADDING) - self.HEADER_HEIGHT
+        if first:
+            height -= self.TITLE_HEIGHT
+        return int(height // self.ROW_HEIGHT) - self.FOOTER_ROWS
+
+    def subtotal_row(self, weight, price, total_weight):
+        """Running subtotal closing a page that the table continues after"""
+        percentage = weight / total_weight if total_weight > 0 else 0
+        return [
+            self.t.get("subtotal", "SUBTOTAL"),
             "",
             "",
             "",
-            f"{total_weight:.3f}",
-            "100%",
-            f"{total_price:.3f}"
-        ])
+            f"{weight:.3f}",
+            f"{percentage:.1%}",
+            f"{price:.3f}"
+        ]
+
+    def total_rows(self, total_weight, adjusted_weight, steel_price, weight_error):
+        """The total and adjusted total rows closing the table"""
+        return [
+            [
+                self.t["total"],
+                "",
+                "",
+                "",
+                f"{total_weight:.3f}",
+                "100%",
+                f"{total_weight * steel_price:.3f}"
+            ],
+            [
+                self.t["total_adjusted"].format(weight_error),
+                "",
+                "",
+                "",
+                f"{adjusted_weight:.3f}",
+                f"{1 + weight_error / 100:.0%}",
+                f"{adjusted_weight * steel_price:.3f}"
+            ]
+        ]
+
+    def draw_title(self, pdf, left, top, width):
+        """Title and date lines; returns the y below them"""
+        pdf.setFillColor(self.colors.black)
+        pdf.setFont(self.bold_font, 16)
+        draw = pdf.drawRightString if self.language == "ar" else pdf.drawCentredString
+        x = left + width if self.language == "ar" else left + width / 2
+        draw(x, top - 16, self.t["title"])
+        pdf.setFont(self.font, 10)
+        date_text = f"{self.t['date']}: {datetime.datetime.now().strftime('%d/%m/%Y')}"
+        if self.language == "ar":
+            pdf.drawRightString(left + width, top - 62, date_text)
+        else:
+            pdf.drawString(left, top - 62, date_text)
+        return top - 62 - 26
+
+    def draw_row(self, pdf, left, top, values, header=False, shaded=False):
+        """One table row with its top edge at top; returns the y below it"""
+        colors = self.colors
+        height = self.HEADER_HEIGHT if header else self.ROW_HEIGHT
+        bottom = top - height
+        if header or shaded:
+            pdf.setFillColor(colors.grey if header else colors.lightgrey)
+            pdf.rect(left, bottom, self.edges[-1], height, stroke=0, fill=1)
+        pdf.setFillColor(colors.whitesmoke if header else colors.black)
+        pdf.setFont(self.bold_font if header else self.font, 11 if header else 10)
+        baseline = bottom + (12 if header else 5)
+        for centre, value in zip(self.centres, values):
+            pdf.drawCentredString(left + centre, baseline, str(value))
+        pdf.setStrokeColor(colors.black)
+        pdf.setLineWidth(1)
+        pdf.line(left, bottom, left + self.edges[-1], bottom)
+        return bottom
+
+    def draw_grid(self, pdf, left, top, bottom):
+        """Column lines and the outer box of the rows drawn between top and bottom"""
+        pdf.setStrokeColor(self.colors.black)
+        pdf.setLineWidth(1)
+        for edge in self.edges[1:-1]:
+            pdf.line(left + edge, top, left + edge, bottom)
+        pdf.setLineWidth(2)
+        pdf.rect(left, bottom, self.edges[-1], top - bottom, stroke=1, fill=0)
+
+_INVOICE_TEMPLATES = {}
+
+def invoice_template(language):
+    """The InvoiceTemplate of a language, built on first use"""
+    if language not in translations:
+        language = "en"
+    template = _INVOICE_TEMPLATES.get(language)
+    if template is None:
+        template = _INVOICE_TEMPLATES[language] = InvoiceTemplate(language)
+    return template
+
+def _invoice_rows(results, weight_stats, total_weight, steel_price):
+    """Yield (row, weight, price): the invoice table row of each profile and its weight and price"""
+    for profile, stock_length, stock_used in results:
+        qty = stock_used.piece_count()
+        profile_weight = weight_stats.get(profile, 0)
+        weight_per_unit = profile_weight/qty if qty > 0 else 0
+        percentage = profile_weight / total_weight if total_weight > 0 else 0
+        price = profile_weight * steel_price
         
-        # Adjusted total row using translations
-        data.append([
-            t["total_adjusted"].format(weight_error),
-            "",
-            "",
-            "",
-            f"{adjusted_weight:.3f}",
-            f"{adjusted_percentage:.0%}",
-            f"{adjusted_price:.3f}"
-        ])
+        yield [
+            profile,
+            f"{weight_per_unit:.3f}",
+            f"{stock_length}",
+            f"{qty}",
+            f"{profile_weight:.3f}",
+            f"{percentage:.1%}",
+            f"{price:.3f}"
+        ], profile_weight, price
+
+def _invoice_pages(rows, template):
+    """Split _invoice_rows into the table's pages, holding one page of rows at a time.
+
+    Yields (chunk, weight, price, last): the page's rows, the running weight
+    and price up to its end, and whether it is the last page.
+    """
+    rows = iter(rows)
+    weight = price = 0
+    chunk = list(itertools.islice(rows, template.rows_per_page(first=True)))
+    while True:
+        for _, row_weight, row_price in chunk:
+            weight += row_weight
+            price += row_price
+        following = list(itertools.islice(rows, template.rows_per_page()))
+        yield [values for values, _, _ in chunk], weight, price, not following
+        if not following:
+            return
+        chunk = following
+
+def _write_invoice_canvas(pdf_path, template, rows, totals, total_weight, plan_pages=None):
+    """Draw the invoice directly on a canvas, page by page"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    
+    page_width, page_height = A4
+    margin = template.MARGIN
+    left = (page_width - template.edges[-1]) / 2
+    pdf = canvas.Canvas(pdf_path, pagesize=A4)
+    
+    for number, (chunk, weight, price, last) in enumerate(_invoice_pages(rows, template)):
+        if number:
+            pdf.showPage()
+            top = page_height - margin
+        else:
+            top = template.draw_title(pdf, margin, page_height - margin, page_width - 2 * margin)
+        y = template.draw_row(pdf, left, top, template.headers, header=True)
+        for values in chunk:
+            y = template.draw_row(pdf, left, y, values)
+        for values in totals if last else [template.subtotal_row(weight, price, total_weight)]:
+            y = template.draw_row(pdf, left, y, values, shaded=True)
+        template.draw_grid(pdf, left, top, y)
+    
+    # Each profile's plan pages, scaled to the page width
+    width = page_width - 2 * margin
+    for entry in plan_pages or []:
+        pdf.showPage()
+        pdf.setFillColor(template.colors.black)
+        pdf.setFont(template.font, 10)
+        y = page_height - margin - 12
+        pdf.drawString(margin, y, f"{entry['profile']} ({entry['bars']})")
+        y -= 6
+        for page in entry['pages']:
+            height = width * page['height_px'] / page['width_px']
+            if y - height < margin:
+                pdf.showPage()
+                y = page_height - margin
+            y -= height
+            pdf.drawImage(page['path'], margin, y, width=width, height=height)
+    pdf.save()
+
+def export_invoice_pdf(results, weight_stats, total_weight, adjusted_weight, steel_price, weight_error, output_path, language="fr",
+                       plan_pages=None, fast=None):
+    """Export a PDF invoice, followed by the plan pages of draw_cutting_plan_pages when given.
+
+    The table runs over as many pages as needed, each repeating the header
+    and ending with a running subtotal. fast draws the invoice straight on a canvas rather than through a
+    platypus table; by default it does so above INVOICE_CANVAS_ROWS rows.
+    """
+    try:
+        template = invoice_template(language)
+        pdf_path = output_path.replace('.xlsx', '_facture.pdf')
+        rows = _invoice_rows(results, weight_stats, total_weight, steel_price)
+        totals = template.total_rows(total_weight, adjusted_weight, steel_price, weight_error)
+        if fast is None:
+            fast = len(results) > INVOICE_CANVAS_ROWS
         
-        # Create table
-        table = Table(data, colWidths=[35*mm, 25*mm, 25*mm, 20*mm, 30*mm, 25*mm, 30*mm])
+        if fast:
+            _write_invoice_canvas(pdf_path, template, rows, totals, total_weight, plan_pages)
+            print(f"Invoice PDF exported to: {pdf_path}")
+            return
         
-        # Add style to table
-        table.setStyle(table_style)
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer, Image, PageBreak
         
-        elements.append(table)
+        # Create PDF document with font embedding
+        doc = SimpleDocTemplate(
+            pdf_path,
+            pagesize=A4,
+            rightMargin=30,
+            leftMargin=30,
+            topMargin=30,
+            bottomMargin=30,
+            encoding='UTF-8'  # Ensure UTF-8 encoding
+        )
+        
+        # Content elements
+        elements = []
+        
+        # Add title and date with proper RTL handling
+        elements.append(Paragraph(template.t["title"], template.title_style))
+        date_text = f"{template.t['date']}: {datetime.datetime.now().strftime('%d/%m/%Y')}"
+        elements.append(Paragraph(date_text, template.normal_style))
+        elements.append(Spacer(1, 20))
+        
+        # One table per page, so no table is ever measured and split whole
+        for number, (chunk, weight, price, last) in enumerate(_invoice_pages(rows, template)):
+            if number:
+                elements.append(PageBreak())
+            if last:
+                table = Table([template.headers] + chunk + totals, colWidths=template.col_widths)
+                table.setStyle(template.table_style)
+            else:
+                table = Table([template.headers] + chunk + [template.subtotal_row(weight, price, total_weight)],
+                              colWidths=template.col_widths)
+                table.setStyle(template.page_style)
+            elements.append(table)
+        
+        # Each profile's plan pages, scaled to the page width
+        for entry in plan_pages or []:
+            elements.append(PageBreak())
+            elements.append(Paragraph(f"{entry['profile']} ({entry['bars']})", template.normal_style))
+            for page in entry['pages']:
+                width = doc.width
+                height = width * page['height_px'] / page['width_px']
+                elements.append(Image(page['path'], width=width, height=height))
         
         # Build PDF
         doc.build(elements)
@@ -483,6 +1199,8 @@ def export_invoice_pdf(results, weight_stats, total_weight, adjusted_weight, ste
 
 def export_invoice_excel(results, weight_stats, total_weight, adjusted_weight, steel_price, weight_error, output_path, language="fr"):
     """Export invoice to Excel"""
+    import xlsxwriter
+    
     try:
         # Get translations with fallback
         if language not in translations:
@@ -558,7 +1276,7 @@ def export_invoice_excel(results, weight_stats, total_weight, adjusted_weight, s
             stock_length = result[1]
             stock_used = result[2]
             
-            qty = sum(len(pieces) for pieces, _ in stock_used)
+            qty = stock_used.piece_count()
             profile_weight = weight_stats.get(profile, 0)
             weight_per_unit = profile_weight/qty if qty > 0 else 0
             percentage = profile_weight / total_weight if total_weight > 0 else 0
@@ -603,6 +1321,69 @@ def export_invoice_excel(results, weight_stats, total_weight, adjusted_weight, s
     except Exception as e:
         print(f"Error exporting invoice to Excel: {str(e)}")
         raise
+# Outputs co.main can write, each also a run_exports task name
+ARTIFACTS = ('plan-image', 'plan-excel', 'invoice-excel', 'invoice-pdf')
+
+def _timed_export(func, args):
+    """Run one export, timed where it runs (a pool worker or this process)"""
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+def run_exports(tasks, workers=None, progress=None, cancelled=None):
+    """Run export tasks, each as soon as the tasks it needs have finished.
+
+    tasks maps a name to (func, args, needs): func is called with args
+    followed by the results of the tasks named in needs. With workers > 1
+    (None = one per CPU) independent tasks run concurrently in a process
+    pool, so the exports take as long as the slowest chain of them rather
+    than their sum. progress(done, total, name) is called as each task
+    finishes and cancelled() is polled in between.
+    Returns (results, timings), both keyed by task name, timings in seconds.
+    """
+    results, timings = {}, {}
+    waiting = dict(tasks)
+    
+    def ready():
+        names = [name for name, (_, _, needs) in waiting.items() if all(need in results for need in needs)]
+        if waiting and not names and not running:
+            raise ValueError(f"Export tasks wait on missing tasks: {', '.join(sorted(waiting))}")
+        return [(name, waiting.pop(name)) for name in names]
+    
+    def call_args(task):
+        func, args, needs = task
+        return func, tuple(args) + tuple(results[need] for need in needs)
+    
+    def finished(name, result, seconds):
+        results[name] = result
+        timings[name] = round(seconds, 3)
+        if progress is not None:
+            progress(len(results), len(tasks), name)
+    
+    running = {}
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers == 1 or len(tasks) < 2:
+        while waiting:
+            for name, task in ready():
+                _checkpoint(cancelled)
+                finished(name, *_timed_export(*call_args(task)))
+        return results, timings
+    
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        while waiting or running:
+            for name, task in ready():
+                running[executor.submit(_timed_export, *call_args(task))] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished(running.pop(future), *future.result())
+            if cancelled is not None and cancelled():
+                # Queued exports are dropped; the pool only waits for running ones
+                for future in running:
+                    future.cancel()
+                raise OptimizationCancelled()
+    return results, timings
+
 def get_app_data_dir():
     if sys.platform == "win32":
         return os.path.join(os.getenv('APPDATA'), 'Cutting Optimizer Pro')
@@ -610,7 +1391,27 @@ def get_app_data_dir():
         return os.path.expanduser('~/Library/Application Support/Cutting Optimizer Pro')
     else:
         return os.path.expanduser('~/.config/Cutting Optimizer Pro')
-def main(data_df, settings_df, input_filename, default_length, weight_error, steel_price, language="fr"):
+def main(data_df, settings_df, input_filename, default_length, weight_error, steel_price, language="fr", mode="ffd",
+         kerf=0, trim_start=0, trim_end=0, workers=1, progress=None, cancelled=None, export_workers=None,
+         artifacts=ARTIFACTS):
+    """Run the whole pipeline: clean, optimize, compute statistics, draw and export.
+
+    artifacts picks the outputs to write from ARTIFACTS; an empty one only
+    returns the statistics, and the rendering and export libraries of
+    outputs not requested are never imported.
+    The plan pages and exports run through run_exports, concurrently unless
+    export_workers is 1; the returned 'timings' gives each one's seconds.
+    progress(stage, done, total, label) reports each stage ("clean",
+    "optimize", "statistics", "export") and, within "optimize" and
+    "export", each profile packed or output written. cancelled() is polled
+    between steps; when it returns True the run stops with
+    OptimizationCancelled.
+    """
+    def report(stage, done=0, total=1, label=''):
+        _checkpoint(cancelled)
+        if progress is not None:
+            progress(stage, done, total, label)
+    
     try:
         # Get base filename without extension
         base_filename = os.path.splitext(os.path.basename(input_filename))[0]
@@ -620,55 +1421,80 @@ def main(data_df, settings_df, input_filename, default_length, weight_error, ste
         output_dir = os.path.join(app_data, 'output', base_filename)
         os.makedirs(output_dir, exist_ok=True)
         
+        unknown = set(artifacts) - set(ARTIFACTS)
+        if unknown:
+            raise ValueError(f"Unknown artifacts: {', '.join(sorted(unknown))}")
+        
         # Create output file paths
         script_dir = os.path.dirname(os.path.abspath(__file__))
-        output_excel_path = os.path.join(script_dir, 'output', f'{base_filename}_cutting_plan.xlsx')
+        output_base = os.path.join(script_dir, 'output', base_filename)
+        output_excel_path = f'{output_base}_cutting_plan.xlsx'
         output_invoice_excel = os.path.join(script_dir, 'output', f'{base_filename}_facture.xlsx')
-        output_image_path = os.path.join(script_dir, 'output', f'{base_filename}_cutting_plan.png')
+        output_plan_dir = os.path.join(script_dir, 'output', f'{base_filename}_cutting_plan')
         output_pdf_path = os.path.join(script_dir, 'output', f'{base_filename}_facture.pdf')
         
         # Clean data
+        report('clean')
         data_cleaned = clean_data(data_df)
         
+        # Per-profile lookups shared by the optimizer and the statistics
+        index = ProfileIndex(data_cleaned)
+        
         # Run optimization
-        results = optimize_cutting(data_cleaned, settings_df, default_length)
+        report('optimize')
+        results = optimize_cutting(data_cleaned, settings_df, default_length, mode, kerf, trim_start, trim_end, workers,
+                                   index, progress=lambda done, total, profile: report('optimize', done, total, profile),
+                                   cancelled=cancelled)
         
         # Calculate statistics
+        report('statistics')
         waste_stats = calculate_waste_percentage(results)
-        weight_stats = calculate_weight_stats(data_cleaned)
+        weight_stats = calculate_weight_stats(data_cleaned, index)
         
         # Calculate total and adjusted weights
         total_weight = sum(weight_stats.values())
         adjusted_weight = total_weight * (1 + weight_error/100)
         total_price = adjusted_weight * steel_price
         
-        # Draw cutting plan
-        draw_cutting_plan(results, output_image_path)
-        
-        # Export to Excel files
-        export_to_excel(results, output_excel_path, output_image_path, language)
-        export_invoice_excel(
-            results,
-            weight_stats,
-            total_weight,
-            adjusted_weight,
-            steel_price,
-            weight_error,
-            output_invoice_excel,
-            language
-        )
-        
-        # Export invoice PDF
-        export_invoice_pdf(
-            results,
-            weight_stats,
-            total_weight,
-            adjusted_weight,
-            steel_price,
-            weight_error,
-            output_pdf_path,
-            language
-        )
+        # Draw the plan pages and write the requested exports; the plan
+        # workbook and the invoice PDF embed the pages when they are drawn
+        invoice_args = (results, weight_stats, total_weight, adjusted_weight, steel_price, weight_error)
+        pages = ('plan-image',) if 'plan-image' in artifacts else ()
+        no_pages = () if pages else (None,)
+        tasks = {
+            'plan-image': (draw_cutting_plan_pages, (results, output_plan_dir, PLAN_PAGE_BARS, workers), ()),
+            'plan-excel': (export_to_excel, (results, output_base, None, language) + no_pages, pages),
+            # The exporter appends _facture itself
+            'invoice-excel': (export_invoice_excel, invoice_args + (f'{output_base}.xlsx', language), ()),
+            'invoice-pdf': (export_invoice_pdf, invoice_args + (output_pdf_path, language) + no_pages, pages)
+        }
+        tasks = {name: task for name, task in tasks.items() if name in artifacts}
+        labels = {
+            'plan-image': output_plan_dir,
+            'plan-excel': output_excel_path,
+            'invoice-excel': output_invoice_excel,
+            'invoice-pdf': output_pdf_path
+        }
+        if pages and export_workers != 1:
+            # Draw the pages in batches in the export pool itself, next to the
+            # exports that do not need them; plan-image then writes the index
+            os.makedirs(output_plan_dir, exist_ok=True)
+            plan_index, jobs = plan_page_jobs(results, output_plan_dir, PLAN_PAGE_BARS)
+            batch_count = max(1, min(len(jobs), export_workers or os.cpu_count() or 1))
+            batches = [f'plan-image-{n + 1}' for n in range(batch_count)]
+            for n, name in enumerate(batches):
+                # Every batch-th page, so each batch gets a share of every profile
+                tasks[name] = (draw_plan_page_jobs, (jobs[n::batch_count],), ())
+                labels[name] = output_plan_dir
+            tasks['plan-image'] = (write_plan_index, (plan_index, output_plan_dir), tuple(batches))
+        timings = {}
+        if tasks:
+            report('export', 0, len(tasks))
+            _, timings = run_exports(tasks, export_workers,
+                                     lambda done, total, name: report('export', done, total, labels[name]),
+                                     cancelled)
+            for name, seconds in timings.items():
+                print(f"{name}: {seconds}s")
         
         return {
             'waste': waste_stats,
@@ -676,9 +1502,12 @@ def main(data_df, settings_df, input_filename, default_length, weight_error, ste
                 'total': round(total_weight, 3),
                 'adjusted': round(adjusted_weight, 3),
                 'price': round(total_price, 2)
-            }
+            },
+            'timings': timings
         }
         
+    except OptimizationCancelled:
+        raise
     except Exception as e:
         print(f"Error in main function: {str(e)}")
         raise
@@ -2,19 +2,17 @@
 
 import sys
 import json
+import multiprocessing
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QFileDialog,
                            QVBoxLayout, QHBoxLayout, QWidget, QLabel, QSpinBox,
-                           QTableWidget, QTableWidgetItem, QHeaderView, QProgressBar,
+                           QTableView, QStyledItemDelegate, QHeaderView, QProgressBar,
                            QComboBox, QAction, QToolButton, QMenu, QGroupBox, QLineEdit,
                            QMessageBox, QTextEdit, QDialog, QSplitter, QPlainTextEdit,
-                           QDoubleSpinBox)
-from PyQt5.QtCore import Qt, QTimer, QSize, QThread
+                           QDoubleSpinBox, QCheckBox)
+from PyQt5.QtCore import Qt, QTimer, QSize, QThread, pyqtSignal, QAbstractTableModel, QModelIndex
 from PyQt5.QtGui import QColor, QPalette, QFont, QIcon, QPixmap
-import co
-import pandas as pd
 import webbrowser
 import os
-import requests
 from packaging import version
 import logging
 import traceback
@@ -26,6 +24,11 @@ import sys
 import logging
 from datetime import datetime
 from pathlib import Path
+
+# translations.json ships next to this module; resolved like co.RESOURCE_DIR
+# so the GUI also starts from another working directory
+RESOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 def get_app_data_dir():
     if sys.platform == "win32":
         return os.path.join(os.getenv('APPDATA'), 'Cutting Optimizer Pro')
@@ -72,6 +75,13 @@ def setup_logger():
         raise
 logger = setup_logger()
 
+def load_co():
+    """Import co (and with it pandas) on first use instead of at startup"""
+    import co
+    # Keep packed plans across restarts so unchanged profiles are not repacked
+    co.RESULT_CACHE.directory = os.path.join(get_app_data_dir(), 'cache', 'results')
+    return co
+
 COLORS = {
     'dark': {
         'primary': '#0078d4',
@@ -143,48 +153,70 @@ class SplashScreen(QWidget):
             
             self.setLayout(layout)
             
-            # Start progress with delay
-            self.counter = 0
-            self.timer = QTimer()
-            self.timer.timeout.connect(self.progress_update)
-            self.timer.start(30)
-            logger.debug("SplashScreen timer started")
+            # Real startup work runs behind the splash and drives the progress bar
+            self.warmup = WarmupWorker(self)
+            self.warmup.milestone.connect(self.on_milestone)
+            self.warmup.finished.connect(self.show_main_window)
+            self.warmup.start()
+            logger.debug("SplashScreen warmup started")
             
         except Exception as e:
             logger.error(f"Error in SplashScreen initialization: {str(e)}")
             logger.error(traceback.format_exc())
             raise
 
-    def progress_update(self):
+    def on_milestone(self, percent, description):
+        self.progress.setValue(percent)
+        self.progress.setFormat(f"{description} %p%")
+        logger.debug(f"Startup: {description} ({percent}%)")
+
+    def show_main_window(self):
         try:
-            self.progress.setValue(self.counter)
-            logger.debug(f"Progress update: {self.counter}%")
-            
-            if self.counter >= 100:
-                logger.info("Progress reached 100%, creating main window")
-                self.timer.stop()
-                
-                try:
-                    logger.debug("Creating main window")
-                    self.main_window = CuttingOptimizerGUI()
-                    logger.debug("Main window created successfully")
-                    self.main_window.show()
-                    logger.debug("Main window shown")
-                    self.close()
-                    logger.debug("Splash screen closed")
-                    
-                except Exception as e:
-                    logger.error(f"Error creating main window: {str(e)}")
-                    logger.error(traceback.format_exc())
-                    raise
-                    
-            self.counter += 1
+            logger.debug("Creating main window")
+            self.main_window = CuttingOptimizerGUI(self.warmup.translations)
+            logger.debug("Main window created successfully")
+            self.main_window.show()
+            logger.debug("Main window shown")
+            self.close()
+            logger.debug("Splash screen closed")
             
         except Exception as e:
-            logger.error(f"Error in progress update: {str(e)}")
+            logger.error(f"Error creating main window: {str(e)}")
             logger.error(traceback.format_exc())
             raise
 
+class WarmupWorker(QThread):
+    """Startup work done off the GUI thread while the splash is shown.
+
+    Each step emits milestone(percent, description). A failed step is only
+    logged: the main window loads whatever is missing on first use.
+    """
+    milestone = pyqtSignal(int, str)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.translations = None
+    
+    def run(self):
+        try:
+            self.milestone.emit(10, "Loading translations")
+            with open(os.path.join(RESOURCE_DIR, 'translations.json'), 'r', encoding='utf-8') as f:
+                self.translations = json.load(f)
+            
+            self.milestone.emit(30, "Loading data libraries")
+            import pandas
+            
+            self.milestone.emit(60, "Loading optimizer")
+            load_co()
+            
+            self.milestone.emit(85, "Preparing caches")
+            for name in ('demand', 'results'):
+                os.makedirs(os.path.join(get_app_data_dir(), 'cache', name), exist_ok=True)
+        except Exception as e:
+            logger.error(f"Startup warmup failed: {str(e)}")
+            logger.error(traceback.format_exc())
+        self.milestone.emit(100, "Ready")
+
 class DebugWindow(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -234,10 +266,14 @@ class DebugWindow(QDialog):
         # Set splitter sizes to be equal
         splitter.setSizes([500, 500])
         
+        # Cancel button, enabled while an optimization is running
+        self.cancel_btn = QPushButton(parent.tr("cancel_optimization"))
+        self.cancel_btn.setEnabled(False)
+        
         # Close button
         close_btn = QPushButton("Close")
         close_btn.clicked.connect(self.close)
-        close_btn.setStyleSheet("""
+        button_style = """
             QPushButton {
                 background-color: #3c3f41;
                 color: white;
@@ -249,18 +285,25 @@ class DebugWindow(QDialog):
             QPushButton:hover {
                 background-color: #4c5052;
             }
-        """)
+        """
+        close_btn.setStyleSheet(button_style)
+        self.cancel_btn.setStyleSheet(button_style)
+        
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        button_layout.addWidget(self.cancel_btn)
+        button_layout.addWidget(close_btn)
         
         # Add widgets to layout
         layout.addWidget(splitter)
-        layout.addWidget(close_btn, alignment=Qt.AlignRight)
+        layout.addLayout(button_layout)
         
         self.setLayout(layout)
     
     def append_results(self, text):
         self.results_text.append(text)
     
-    def append_debug(self, text, delay=False):
+    def append_debug(self, text):
         cursor = self.debug_text.textCursor()
         cursor.movePosition(cursor.End)
         self.debug_text.setTextCursor(cursor)
@@ -268,9 +311,207 @@ class DebugWindow(QDialog):
         self.debug_text.verticalScrollBar().setValue(
             self.debug_text.verticalScrollBar().maximum()
         )
-        if delay:
-            QApplication.processEvents()  # Update UI
-            QThread.msleep(100)  # Small delay for visual effect
+
+class OptimizationWorker(QThread):
+    """Runs co.main off the GUI thread.
+
+    Progress is reported through signals and cancellation is cooperative:
+    requestInterruption() makes co.main stop at its next checkpoint.
+    """
+    progress = pyqtSignal(str, int, int, str)  # stage, done, total, label
+    succeeded = pyqtSignal(dict)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+    
+    def __init__(self, args, kwargs, parent=None):
+        super().__init__(parent)
+        self.args = args
+        self.kwargs = kwargs
+    
+    def run(self):
+        co = load_co()
+        try:
+            stats = co.main(*self.args, progress=self.progress.emit,
+                            cancelled=self.isInterruptionRequested, **self.kwargs)
+        except co.OptimizationCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            logger.error(f"Optimization failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            self.failed.emit(str(e))
+        else:
+            self.succeeded.emit(stats or {})
+
+class DemandLoadWorker(QThread):
+    """Reads a work file with co.load_demand off the GUI thread.
+
+    loaded emits (data, demand): the aggregated work file and one row per
+    (profile, length), each profile's lengths kept together.
+    """
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, filename, parent=None):
+        super().__init__(parent)
+        self.filename = filename
+    
+    def run(self):
+        try:
+            import pandas as pd
+            co = load_co()
+            
+            # Streamed and already aggregated per (profile, length)
+            data = co.load_demand(self.filename)
+            demand = co.group_demand(data)
+            demand = demand.iloc[pd.factorize(demand['Profil'])[0].argsort(kind='stable')]
+        except Exception as e:
+            logger.error(f"Loading {self.filename} failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            self.failed.emit(str(e))
+        else:
+            self.loaded.emit((data, demand))
+
+class ProfileTableModel(QAbstractTableModel):
+    """Profile demand behind the profile table, stored column by column.
+
+    Rows are inserted and removed one at a time instead of rebuilding the
+    table, and the view only creates a widget for the cell being edited.
+    """
+    PROFILE, LENGTH, QUANTITY, STOCK_LENGTH, DELETE = range(5)
+
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.profiles = []
+        self.lengths = []
+        self.quantities = []
+        self.stock_lengths = []
+        self._keys = set()  # (profile, length) pairs already in the table
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.profiles)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if column == self.PROFILE:
+                return self.profiles[row]
+            if column == self.LENGTH:
+                return self.lengths[row]
+            if column == self.QUANTITY:
+                return self.quantities[row]
+            if column == self.STOCK_LENGTH:
+                stock_length = self.stock_lengths[row]
+                return stock_length if role == Qt.EditRole else f"{stock_length} mm"
+            if column == self.DELETE and role == Qt.DisplayRole:
+                return "🗑️"
+        if role == Qt.TextAlignmentRole and column == self.DELETE:
+            return Qt.AlignCenter
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        if index.column() == self.QUANTITY:
+            self.quantities[index.row()] = int(value)
+        elif index.column() == self.STOCK_LENGTH:
+            self.stock_lengths[index.row()] = int(value)
+        else:
+            return False
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() in (self.QUANTITY, self.STOCK_LENGTH):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.headers[section]
+        return super().headerData(section, orientation, role)
+
+    def set_headers(self, headers):
+        self.headers = headers
+        self.headerDataChanged.emit(Qt.Horizontal, 0, len(headers) - 1)
+
+    def set_demand(self, profiles, lengths, quantities, stock_lengths):
+        """Replace the whole table in one reset"""
+        self.beginResetModel()
+        self.profiles = list(profiles)
+        self.lengths = list(lengths)
+        self.quantities = list(quantities)
+        self.stock_lengths = list(stock_lengths)
+        self._keys = set(zip(self.profiles, self.lengths))
+        self.endResetModel()
+
+    def contains(self, profile, length):
+        return (profile, length) in self._keys
+
+    def append_row(self, profile, length, quantity, stock_length):
+        row = len(self.profiles)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.profiles.append(profile)
+        self.lengths.append(length)
+        self.quantities.append(quantity)
+        self.stock_lengths.append(stock_length)
+        self._keys.add((profile, length))
+        self.endInsertRows()
+
+    def removeRows(self, row, count=1, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or count < 1 or row + count > len(self.profiles):
+            return False
+        self.beginRemoveRows(parent, row, row + count - 1)
+        self._keys.difference_update(zip(self.profiles[row:row + count], self.lengths[row:row + count]))
+        for column in (self.profiles, self.lengths, self.quantities, self.stock_lengths):
+            del column[row:row + count]
+        self.endRemoveRows()
+        return True
+
+    def set_all_stock_lengths(self, stock_length):
+        if not self.profiles:
+            return
+        self.stock_lengths = [stock_length] * len(self.profiles)
+        self.dataChanged.emit(self.index(0, self.STOCK_LENGTH),
+                              self.index(len(self.profiles) - 1, self.STOCK_LENGTH))
+
+    def rows(self):
+        """(profile, length, quantity, stock_length) for every row"""
+        return zip(self.profiles, self.lengths, self.quantities, self.stock_lengths)
+
+    def profile_count(self):
+        return len(set(self.profiles))
+
+class SpinBoxDelegate(QStyledItemDelegate):
+    """Edits an integer cell with a QSpinBox that only exists while editing"""
+
+    def __init__(self, minimum, maximum, suffix="", parent=None):
+        super().__init__(parent)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.suffix = suffix
+
+    def createEditor(self, parent, option, index):
+        editor = QSpinBox(parent)
+        editor.setRange(self.minimum, self.maximum)
+        editor.setSuffix(self.suffix)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setValue(int(index.data(Qt.EditRole)))
+
+    def setModelData(self, editor, model, index):
+        editor.interpretText()
+        model.setData(index, editor.value(), Qt.EditRole)
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect)
 
 class UpdateChecker:
     def __init__(self):
@@ -316,6 +557,7 @@ class UpdateChecker:
 
     def check_for_updates(self):
         try:
+            import requests
             response = requests.get(self.github_api_url)
             if response.status_code == 200:
                 latest_version = response.json()["tag_name"].replace("v", "")
@@ -325,13 +567,14 @@ class UpdateChecker:
             return False
 
 class CuttingOptimizerGUI(QMainWindow):
-    def __init__(self):
+    def __init__(self, translations=None):
         try:
             super().__init__()
             logger.debug("Initializing CuttingOptimizerGUI")
             self.current_language = "en"
             self.dark_mode = True  # Default to dark mode
-            self.profiles = {}
+            self.worker = None
+            self.demand_worker = None
             
             try:
                 self.update_checker = UpdateChecker()
@@ -340,7 +583,11 @@ class CuttingOptimizerGUI(QMainWindow):
                 # Continue without update checker
             
             try:
-                self.load_translations()
+                if translations is not None:
+                    # Already loaded behind the splash screen
+                    self.translations = translations
+                else:
+                    self.load_translations()
             except Exception as e:
                 logger.error(f"Failed to load translations: {str(e)}")
                 # Set default translations
@@ -349,9 +596,10 @@ class CuttingOptimizerGUI(QMainWindow):
             self.initUI()
             self.apply_theme()
             
-            # Only check for updates if update_checker was initialized
+            # Only check for updates if update_checker was initialized,
+            # once the window is up so the network call does not delay it
             if hasattr(self, 'update_checker'):
-                self.check_for_updates()
+                QTimer.singleShot(0, lambda: self.check_for_updates(startup=True))
             
             logger.debug("CuttingOptimizerGUI initialized successfully")
         except Exception as e:
@@ -444,7 +692,7 @@ class CuttingOptimizerGUI(QMainWindow):
             }
             
             /* Table */
-            QTableWidget {
+            QTableView {
                 background-color: #252526;
                 alternate-background-color: #2d2d2d;
                 border: 1px solid #3d3d3d;
@@ -543,7 +791,7 @@ class CuttingOptimizerGUI(QMainWindow):
             }
             
             /* Table */
-            QTableWidget {
+            QTableView {
                 background-color: #ffffff;
                 alternate-background-color: #f5f5f5;
                 border: 1px solid #d0d0d0;
@@ -719,17 +967,16 @@ class CuttingOptimizerGUI(QMainWindow):
         input_layout.addWidget(self.add_profile_btn)
         profile_layout.addLayout(input_layout)
 
-        # Profile table
-        self.profile_table = QTableWidget()
-        self.profile_table.setColumnCount(5)
-        headers = [
-            self.tr('profile'),
-            self.tr('length'),
-            self.tr('quantity'),
-            self.tr('stock_length'),
-            ''  # For delete button
-        ]
-        self.profile_table.setHorizontalHeaderLabels(headers)
+        # Profile table, a view over a columnar model so large files stay fast
+        self.profile_model = ProfileTableModel(self.profile_table_headers(), self)
+        self.profile_table = QTableView()
+        self.profile_table.setModel(self.profile_model)
+        self.profile_table.setItemDelegateForColumn(
+            ProfileTableModel.QUANTITY, SpinBoxDelegate(1, 1000, parent=self.profile_table))
+        self.profile_table.setItemDelegateForColumn(
+            ProfileTableModel.STOCK_LENGTH, SpinBoxDelegate(1000, 20000, " mm", self.profile_table))
+        self.profile_table.setEditTriggers(QTableView.AllEditTriggers)
+        self.profile_table.clicked.connect(self.on_profile_table_clicked)
         self.profile_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         profile_layout.addWidget(self.profile_table)
         
@@ -740,8 +987,14 @@ class CuttingOptimizerGUI(QMainWindow):
         bottom_layout = QHBoxLayout()
         self.run_btn = QPushButton(self.tr('run_optimization'))
         self.run_btn.clicked.connect(self.run_optimization)
+        # Quick what-if runs: waste and weight only, no plans or invoices written
+        self.statistics_only_check = QCheckBox(self.tr('statistics_only'))
         self.status_label = QLabel("")
+        self.run_progress = QProgressBar()
+        self.run_progress.setVisible(False)
         bottom_layout.addWidget(self.run_btn)
+        bottom_layout.addWidget(self.statistics_only_check)
+        bottom_layout.addWidget(self.run_progress)
         bottom_layout.addWidget(self.status_label)
         layout.addLayout(bottom_layout)
 
@@ -765,16 +1018,19 @@ class CuttingOptimizerGUI(QMainWindow):
         self.profile_length_label.setText(self.tr('profile_length'))
         self.add_profile_btn.setText(self.tr('add_profile'))
         self.run_btn.setText(self.tr('run_optimization'))
+        self.statistics_only_check.setText(self.tr('statistics_only'))
 
         # Update table headers
-        headers = [
+        self.profile_model.set_headers(self.profile_table_headers())
+
+    def profile_table_headers(self):
+        return [
             self.tr('profile'),
             self.tr('length'),
             self.tr('quantity'),
             self.tr('stock_length'),
             ''  # For delete button
         ]
-        self.profile_table.setHorizontalHeaderLabels(headers)
 
     def select_work_file(self):
         filename, _ = QFileDialog.getOpenFileName(
@@ -786,142 +1042,41 @@ class CuttingOptimizerGUI(QMainWindow):
             self.detect_profiles(filename)
             
     def detect_profiles(self, filename):
-        try:
-            # Determine file type from extension
-            file_extension = filename.lower().split('.')[-1]
-            
-            if file_extension in ['xlsx', 'xls']:
-                # Read Excel file, skipping header rows
-                data = pd.read_excel(filename, engine='openpyxl')
-                data = data.iloc[2:]  # Skip first two rows
-                data.columns = data.iloc[0]  # Use the first row as headers
-                data = data[1:]  # Skip the header row
-            elif file_extension == 'csv':
-                # Try different encodings and delimiters for CSV
-                encodings = ['utf-8', 'latin1', 'iso-8859-1']
-                delimiters = [',', ';', '\t']
-                
-                for encoding in encodings:
-                    for delimiter in delimiters:
-                        try:
-                            data = pd.read_csv(filename, encoding=encoding, sep=delimiter)
-                            # Skip header rows for CSV as well
-                            data = data.iloc[2:]
-                            data.columns = data.iloc[0]
-                            data = data[1:]
-                            break
-                        except Exception as e:
-                            continue
-                    if 'data' in locals():
-                        break
-                    
-            if 'data' not in locals():
-                raise Exception("Could not read CSV file with any combination of encoding and delimiter")
-            
-            print("DEBUG: Available columns:", data.columns.tolist())
-            
-            # Reset profiles
-            self.profiles = {}
-            self.original_data = data  # Store the original data for later use
-            
-            # Convert data types and handle NaN values
-            data['Qté'] = pd.to_numeric(data['Qté'], errors='coerce').fillna(1).astype(int)
-            data['Long.'] = pd.to_numeric(data['Long.'], errors='coerce').fillna(0).astype(int)
-            data['Poids'] = pd.to_numeric(data['Poids'], errors='coerce').fillna(0).astype(float)
-            
-            # Calculate total weight
-            data['Pds Tot'] = data['Qté'] * data['Poids']
-            
-            # Group by profile and collect all lengths
-            for _, row in data.iterrows():
-                profile = str(row['Profil'])  # Convert to string
-                if profile and 'Total' not in profile:
-                    if profile not in self.profiles:
-                        self.profiles[profile] = []
-                    
-                    self.profiles[profile].append({
-                        'length': int(row['Long.']),
-                        'qty': int(row['Qté']),
-                        'weight': float(row['Poids']),
-                        'total_weight': float(row['Pds Tot'])  # Calculate total weight
-                    })
-            
-            self.update_profile_table()
-            self.status_label.setText(f'Detected {len(self.profiles)} profiles')
-            
-        except Exception as e:
-            self.status_label.setText(f'Error detecting profiles: {str(e)}')
-            print(f"Error details: {str(e)}")
-
-    def update_profile_table(self):
-        # Store current values before clearing
-        current_values = {}
-        for row in range(self.profile_table.rowCount()):
-            profile_item = self.profile_table.item(row, 0)
-            length_item = self.profile_table.item(row, 1)
-            
-            if profile_item and length_item:
-                profile_name = profile_item.text()
-                length = int(length_item.text())
-                qty = self.profile_table.cellWidget(row, 2).value()
-                stock = self.profile_table.cellWidget(row, 3).value()
-                
-                # Store the current values
-                current_values[(profile_name, length)] = (qty, stock)
-                
-                # Update the profiles dictionary
-                if profile_name in self.profiles:
-                    for length_data in self.profiles[profile_name]:
-                        if length_data['length'] == length:
-                            length_data['qty'] = qty
-                            length_data['stock_length'] = stock
-
-        # Clear and setup table
-        self.profile_table.setRowCount(0)
-        self.profile_table.setColumnCount(5)
-        self.profile_table.setHorizontalHeaderLabels([
-            self.tr('Profile'),
-            self.tr('Length (mm)'),
-            self.tr('Quantity'),
-            self.tr('Stock Length (mm)'),
-            self.tr('Action')
-        ])
+        if self.demand_worker is not None and self.demand_worker.isRunning():
+            return
+        # Large work files take seconds to read; keep the window responsive
+        # and the run disabled until the table matches the new file
+        self.work_file_btn.setEnabled(False)
+        self.run_btn.setEnabled(False)
+        self.status_label.setText(f'Loading {os.path.basename(filename)}...')
         
-        # Add all profiles
-        for profile_name, lengths in self.profiles.items():
-            for length_data in lengths:
-                current_row = self.profile_table.rowCount()
-                self.profile_table.insertRow(current_row)
-                
-                # Profile name
-                self.profile_table.setItem(current_row, 0, QTableWidgetItem(str(profile_name)))
-                
-                # Length - use the stored length
-                self.profile_table.setItem(current_row, 1, QTableWidgetItem(str(length_data['length'])))
-                
-                # Get stored or previous values
-                prev_qty, prev_stock = current_values.get(
-                    (profile_name, length_data['length']),
-                    (length_data.get('qty', 1), length_data.get('stock_length', self.default_length_spin.value()))
-                )
-                
-                # Quantity
-                qty_spin = QSpinBox()
-                qty_spin.setRange(1, 1000)
-                qty_spin.setValue(prev_qty)
-                self.profile_table.setCellWidget(current_row, 2, qty_spin)
-                
-                # Stock length
-                stock_spin = QSpinBox()
-                stock_spin.setRange(1000, 20000)
-                stock_spin.setValue(prev_stock)
-                stock_spin.setSuffix(" mm")
-                self.profile_table.setCellWidget(current_row, 3, stock_spin)
-                
-                # Delete button
-                delete_btn = QPushButton("🗑️")
-                delete_btn.clicked.connect(lambda checked, r=current_row: self.delete_profile_row(r))
-                self.profile_table.setCellWidget(current_row, 4, delete_btn)
+        self.demand_worker = DemandLoadWorker(filename, self)
+        self.demand_worker.loaded.connect(self.on_demand_loaded)
+        self.demand_worker.failed.connect(self.on_demand_failed)
+        self.demand_worker.finished.connect(self.on_demand_load_finished)
+        self.demand_worker.start()
+
+    def on_demand_loaded(self, loaded):
+        data, demand = loaded
+        self.original_data = data  # Store the cleaned data for later use
+        self.profile_model.set_demand(
+            demand['Profil'].astype(str).tolist(),
+            demand['Long.'].astype(int).tolist(),
+            demand['Qté'].astype(int).tolist(),
+            [self.default_length_spin.value()] * len(demand)
+        )
+        self.status_label.setText(f'Detected {self.profile_model.profile_count()} profiles')
+
+    def on_demand_failed(self, message):
+        self.status_label.setText(f'Error detecting profiles: {message}')
+        print(f"Error details: {message}")
+
+    def on_demand_load_finished(self):
+        self.work_file_btn.setEnabled(True)
+        # An optimization started before the file was picked keeps it disabled
+        self.run_btn.setEnabled(self.worker is None)
+        self.demand_worker.deleteLater()
+        self.demand_worker = None
 
     def add_profile(self):
         name = self.profile_name.text()
@@ -931,59 +1086,32 @@ class CuttingOptimizerGUI(QMainWindow):
             QMessageBox.warning(self, "Warning", self.tr("Please enter a profile name"))
             return
         
-        # Initialize profile if it doesn't exist
-        if name not in self.profiles:
-            self.profiles[name] = []
-        
         # Check if length already exists for this profile
-        length_exists = any(l['length'] == length for l in self.profiles[name])
-        
-        if not length_exists:
+        if not self.profile_model.contains(name, length):
             # Add new length to profile with user-set values
-            self.profiles[name].append({
-                'length': length,
-                'qty': 1,  # Default quantity
-                'stock_length': self.default_length_spin.value()  # Store stock length
-            })
-            
-            self.update_profile_table()
+            self.profile_model.append_row(name, length, 1, self.default_length_spin.value())
             # Only reset length input, keep the profile name
             self.profile_length.setValue(0)
 
+    def on_profile_table_clicked(self, index):
+        if index.column() == ProfileTableModel.DELETE:
+            self.delete_profile_row(index.row())
+
     def delete_profile_row(self, row):
-        profile_name = self.profile_table.item(row, 0).text()
-        length = int(self.profile_table.item(row, 1).text())  # Convert to int
-        
-        # Remove specific length entry from profile
-        if profile_name in self.profiles:
-            self.profiles[profile_name] = [
-                l for l in self.profiles[profile_name] 
-                if l['length'] != length
-            ]
-            
-            # Remove profile if no lengths remain
-            if not self.profiles[profile_name]:
-                del self.profiles[profile_name]
-        
-        self.update_profile_table()
+        self.profile_model.removeRows(row, 1)
 
     def get_profile_settings(self):
-        settings = {}
-        for row in range(self.profile_table.rowCount()):
-            profile = self.profile_table.item(row, 0).text()
-            length = self.profile_table.cellWidget(row, 3).value()
-            settings[profile] = length
-        return settings
+        return dict(zip(self.profile_model.profiles, self.profile_model.stock_lengths))
 
     def update_all_lengths(self):
-        default_length = self.default_length_spin.value()
-        for row in range(self.profile_table.rowCount()):
-            length_spin = self.profile_table.cellWidget(row, 3)
-            if length_spin:
-                length_spin.setValue(default_length)
+        self.profile_model.set_all_stock_lengths(self.default_length_spin.value())
                 
     def run_optimization(self):
+        if self.worker is not None and self.worker.isRunning():
+            return
         try:
+            import pandas as pd
+            
             debug_window = DebugWindow(self)
             debug_window.show()
             
@@ -1001,117 +1129,160 @@ class CuttingOptimizerGUI(QMainWindow):
             output_dir = os.path.join(app_data, 'output', base_filename)
             os.makedirs(output_dir, exist_ok=True)
             
-            # Create output file paths including image path
-            output_image_path = os.path.join(output_dir, f'{base_filename}_cutting_plan.png')
+            debug_window.append_debug(self.tr("starting_optimization"))
+            debug_window.append_debug(f"{self.tr('default_stock_length')}: {self.default_length_spin.value()}mm")
+            debug_window.append_debug(f"{self.tr('kerf_width')}: {self.kerf_width_spin.value()}mm\n")
             
-            debug_window.append_debug(self.tr("starting_optimization"), delay=True)
-            debug_window.append_debug(f"{self.tr('default_stock_length')}: {self.default_length_spin.value()}mm", delay=True)
-            debug_window.append_debug(f"{self.tr('kerf_width')}: {self.kerf_width_spin.value()}mm\n", delay=True)
+            debug_window.append_debug(self.tr("collecting_profile_data"))
             
-            settings_data = {
-                'Profile': [],
-                'Stock Length': [],
-                'Total Needed': []
-            }
+            # The model is only read here on the GUI thread; the worker gets plain data
+            model = self.profile_model
+            profile_lines = [
+                f"\n{self.tr('profile')}: {profile}\n"
+                f"  {self.tr('length')}: {piece_length}mm\n"
+                f"  {self.tr('quantity')}: {quantity}\n"
+                f"  {self.tr('stock_length')}: {stock_length}mm"
+                for profile, piece_length, quantity, stock_length in model.rows()
+            ]
+            
+            # One insert for the whole table instead of one per row
+            debug_window.append_debug("\n".join(profile_lines))
             
-            debug_window.append_debug(self.tr("collecting_profile_data"), delay=True)
-            
-            # Collect data with progress updates
-            for row in range(self.profile_table.rowCount()):
-                profile_item = self.profile_table.item(row, 0)
-                if profile_item and profile_item.text():
-                    profile = profile_item.text()
-                    length_item = self.profile_table.item(row, 1)
-                    qty_spin = self.profile_table.cellWidget(row, 2)
-                    stock_spin = self.profile_table.cellWidget(row, 3)
-                    
-                    if length_item and qty_spin and stock_spin:
-                        piece_length = int(length_item.text())
-                        quantity = qty_spin.value()
-                        stock_length = stock_spin.value()
-                        
-                        debug_window.append_debug(
-                            f"\n{self.tr('profile')}: {profile}\n"
-                            f"  {self.tr('length')}: {piece_length}mm\n"
-                            f"  {self.tr('quantity')}: {quantity}\n"
-                            f"  {self.tr('stock_length')}: {stock_length}mm",
-                            delay=True
-                        )
-                        
-                        settings_data['Profile'].append(profile)
-                        settings_data['Stock Length'].append(stock_length)
-                        settings_data['Total Needed'].append(piece_length * quantity)
-            
-            settings_df = pd.DataFrame(settings_data)
+            settings_df = pd.DataFrame({
+                'Profile': model.profiles,
+                'Stock Length': model.stock_lengths,
+                'Total Needed': [length * qty for length, qty in zip(model.lengths, model.quantities)]
+            })
             debug_window.append_debug("\nCreating optimization data...")
             
             # Create optimization data using original data
             if hasattr(self, 'original_data'):
-                data_df = self.original_data.copy()
+                # Profiles deleted from the table are left out of the run; co
+                # would otherwise pack them on the default stock length
+                data = self.original_data
+                data_df = data[data['Profil'].astype(str).isin(set(model.profiles))].copy()
             else:
                 # Create from profile table if original data not available
-                optimization_data = []
-                for row in range(self.profile_table.rowCount()):
-                    profile_item = self.profile_table.item(row, 0)
-                    if profile_item and profile_item.text():
-                        profile = profile_item.text()
-                        length_item = self.profile_table.item(row, 1)
-                        qty_spin = self.profile_table.cellWidget(row, 2)
-                        
-                        if length_item and qty_spin:
-                            optimization_data.append({
-                                'Profil': profile,
-                                'Long.': int(length_item.text()),
-                                'Qté': qty_spin.value(),
-                                'Poids': 0.0,
-                                'Pds Tot': 0.0
-                            })
-                data_df = pd.DataFrame(optimization_data)
+                data_df = pd.DataFrame({
+                    'Profil': model.profiles,
+                    'Long.': model.lengths,
+                    'Qté': model.quantities,
+                    'Poids': 0.0,
+                    'Pds Tot': 0.0
+                })
             
             debug_window.append_debug("\nRunning optimization algorithm...")
             
-            # Run optimization with updated paths
-            stats = co.main(
-                data_df, 
-                settings_df,
-                input_file,  # Pass the input file path
-                self.default_length_spin.value(),
-                self.weight_error_spin.value(),
-                self.steel_price_spin.value(),
-                self.current_language
-            )
-            
-            if stats:
-                # Display optimization results
-                results_text = self.tr('optimization_results') + "\n\n"
-                for profile, waste_stats in stats['waste'].items():
-                    results_text += self.tr('results_profile').format(profile) + "\n"
-                    results_text += self.tr('results_used_length').format(waste_stats['used_length']) + "\n"
-                    results_text += self.tr('results_total_stock').format(waste_stats['total_stock']) + "\n"
-                    results_text += self.tr('results_waste').format(waste_stats['waste_percentage']) + "\n\n"
-                
-                # Add weight results
-                results_text += self.tr('weight_results') + "\n\n"
-                results_text += self.tr('results_total_weight').format(stats['weight']['total']) + "\n"
-                results_text += self.tr('results_adjusted_weight').format(
+            options = {'kerf': self.kerf_width_spin.value()}
+            if self.statistics_only_check.isChecked():
+                # co.main then skips drawing and exporting, and starts no pool
+                options['artifacts'] = ()
+            
+            # Run the pipeline in a worker so the window stays responsive
+            self.worker = OptimizationWorker(
+                (
+                    data_df,
+                    settings_df,
+                    input_file,  # Pass the input file path
+                    self.default_length_spin.value(),
                     self.weight_error_spin.value(),
-                    stats['weight']['adjusted']
-                ) + "\n"
-                results_text += self.tr('results_total_price').format(
-                    f"{stats['weight']['price']}{self.tr('currency_per_kg').strip()}"
-                ) + "\n\n"
-                
-                debug_window.append_results(results_text)
-                debug_window.append_debug("\nOptimization completed successfully!")
-                
-                self.status_label.setText("Optimization completed!")
+                    self.steel_price_spin.value(),
+                    self.current_language
+                ),
+                options,
+                self
+            )
+            self.worker.progress.connect(lambda stage, done, total, label:
+                                         self.on_optimization_progress(debug_window, stage, done, total, label))
+            self.worker.succeeded.connect(lambda stats: self.on_optimization_succeeded(debug_window, stats))
+            self.worker.failed.connect(lambda message: self.on_optimization_failed(debug_window, message))
+            self.worker.cancelled.connect(lambda: self.on_optimization_cancelled(debug_window))
+            self.worker.finished.connect(lambda: self.on_optimization_finished(debug_window))
+            debug_window.cancel_btn.clicked.connect(self.cancel_optimization)
+            
+            debug_window.cancel_btn.setEnabled(True)
+            self.run_btn.setEnabled(False)
+            self.run_progress.setRange(0, 0)
+            self.run_progress.setVisible(True)
+            self.worker.start()
             
         except Exception as e:
-            error_msg = f"Error: {str(e)}"
-            self.status_label.setText(error_msg)
-            if 'debug_window' in locals():
-                debug_window.append_debug(f"\nERROR: {error_msg}")
-            print(f"Error details: {str(e)}")
+            self.on_optimization_failed(debug_window if 'debug_window' in locals() else None, str(e))
+
+    def cancel_optimization(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.requestInterruption()
+            self.status_label.setText(self.tr("cancelling_optimization"))
+
+    def on_optimization_progress(self, debug_window, stage, done, total, label):
+        if stage == 'optimize' and label:
+            # Per-profile progress
+            self.run_progress.setRange(0, total)
+            self.run_progress.setValue(done)
+            debug_window.append_debug(f"  [{done}/{total}] {self.tr('profile')}: {label}")
+        elif stage == 'export' and label:
+            debug_window.append_debug(f"  {os.path.basename(label)}")
+        elif done == 0:
+            # Stage change, progress within it is unknown
+            self.run_progress.setRange(0, 0)
+            self.status_label.setText(f"{stage}...")
+            debug_window.append_debug(f"\n[{stage}]")
+
+    def on_optimization_succeeded(self, debug_window, stats):
+        if stats:
+            # Display optimization results
+            results_text = self.tr('optimization_results') + "\n\n"
+            for profile, waste_stats in stats['waste'].items():
+                results_text += self.tr('results_profile').format(profile) + "\n"
+                results_text += self.tr('results_used_length').format(waste_stats['used_length']) + "\n"
+                results_text += self.tr('results_total_stock').format(waste_stats['total_stock']) + "\n"
+                results_text += self.tr('results_waste').format(waste_stats['waste_percentage']) + "\n\n"
+            
+            # Add weight results
+            results_text += self.tr('weight_results') + "\n\n"
+            results_text += self.tr('results_total_weight').format(stats['weight']['total']) + "\n"
+            results_text += self.tr('results_adjusted_weight').format(
+                self.weight_error_spin.value(),
+                stats['weight']['adjusted']
+            ) + "\n"
+            results_text += self.tr('results_total_price').format(
+                f"{stats['weight']['price']}{self.tr('currency_per_kg').strip()}"
+            ) + "\n\n"
+            
+            debug_window.append_results(results_text)
+            for name, seconds in stats.get('timings', {}).items():
+                debug_window.append_debug(f"  {name}: {seconds}s")
+            debug_window.append_debug("\nOptimization completed successfully!")
+            
+            self.status_label.setText("Optimization completed!")
+
+    def on_optimization_failed(self, debug_window, message):
+        error_msg = f"Error: {message}"
+        self.status_label.setText(error_msg)
+        if debug_window is not None:
+            debug_window.append_debug(f"\nERROR: {error_msg}")
+        print(f"Error details: {message}")
+
+    def on_optimization_cancelled(self, debug_window):
+        self.status_label.setText(self.tr("optimization_cancelled"))
+        debug_window.append_debug(f"\n{self.tr('optimization_cancelled')}")
+
+    def on_optimization_finished(self, debug_window):
+        debug_window.cancel_btn.setEnabled(False)
+        # A work file still loading keeps the run disabled until it is in
+        self.run_btn.setEnabled(self.demand_worker is None)
+        self.run_progress.setVisible(False)
+        self.worker.deleteLater()
+        self.worker = None
+
+    def closeEvent(self, event):
+        # Stop a running optimization before the window (and its thread) goes away
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.requestInterruption()
+            self.worker.wait()
+        if self.demand_worker is not None and self.demand_worker.isRunning():
+            self.demand_worker.wait()
+        super().closeEvent(event)
 
     def change_language(self, language):
         """Change application language"""
@@ -1126,7 +1297,7 @@ class CuttingOptimizerGUI(QMainWindow):
         self.updateUI()
         
     def load_translations(self):
-        with open('translations.json', 'r', encoding='utf-8') as f:
+        with open(os.path.join(RESOURCE_DIR, 'translations.json'), 'r', encoding='utf-8') as f:
             self.translations = json.load(f)
             
     def tr(self, key):
@@ -1135,7 +1306,7 @@ class CuttingOptimizerGUI(QMainWindow):
     def get_current_icons(self):
         return self.icons['dark' if self.dark_mode else 'light']
 
-    def check_for_updates(self):
+    def check_for_updates(self, startup=False):
         """Check for software updates"""
         update_available = self.update_checker.check_for_updates()
         
@@ -1151,7 +1322,7 @@ class CuttingOptimizerGUI(QMainWindow):
                 webbrowser.open(self.update_checker.update_url)
         else:
             # Only show if manually checked (not on startup)
-            if hasattr(self, 'isVisible') and self.isVisible():
+            if not startup and self.isVisible():
                 QMessageBox.information(
                     self,
                     self.tr('No Updates'),
@@ -1245,9 +1416,6 @@ def main():
             splash.show()
             logger.info("SplashScreen shown")
             
-            # Add a small delay to ensure splash screen is visible
-            QTimer.singleShot(100, lambda: logger.info("Splash screen timer triggered"))
-            
             result = app.exec_()
             logger.info(f"Application exited with code: {result}")
             sys.exit(result)
@@ -1265,4 +1433,6 @@ def main():
         sys.exit(1)
 
 if __name__ == '__main__':
+    # Needed by the frozen Windows build for co's process pools
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,581 @@
+"""Packing engines for the one-dimensional cutting problem.
+
+Demand is handled as (length, count) pairs end to end: the engines never
+expand a quantity into individual pieces. Bars are tracked as groups of
+identical bars, and a group is only split when a fill touches part of it, so
+time and memory follow the number of distinct lengths and cut patterns rather
+than the total quantity.
+
+The result for one profile is a ``StockUsage``: a list of ``Pattern`` records
+(pattern x repeat count) that still iterates as ``(pieces, used_length)``
+tuples, one per physical bar, which is the shape ``co.optimize_cutting`` has
+always produced.
+"""
+from collections import namedtuple
+import math
+
+import numpy as np
+
+# Optional: HiGHS through SciPy solves the master LP faster when installed.
+# Imported on first use only, as scipy.optimize alone takes about half a
+# second to import; False once it is known to be missing.
+_linprog = None
+
+
+def _highs_linprog():
+    """scipy.optimize.linprog, or None when SciPy is not installed"""
+    global _linprog
+    if _linprog is None:
+        try:
+            from scipy.optimize import linprog
+            _linprog = linprog
+        except ImportError:
+            _linprog = False
+    return _linprog or None
+
+
+# Bump whenever an engine can return a different plan for the same input,
+# so cached plans from an older version are not reused
+ENGINE_VERSION = 3
+
+
+class SegmentTree:
+    """Sparse max segment tree answering "leftmost slot holding at least x".
+
+    Nodes are created on first write, so memory follows the number of
+    occupied slots rather than the size of the key space, and every update
+    or query costs O(log size).
+    """
+
+    def __init__(self, size):
+        self.depth = max(1, (int(size) - 1).bit_length())
+        self.size = 1 << self.depth
+        # Node 0 is the null child, node 1 the root
+        self.best = [-1, -1]
+        self.left = [0, 0]
+        self.right = [0, 0]
+
+    def _new_node(self):
+        self.best.append(-1)
+        self.left.append(0)
+        self.right.append(0)
+        return len(self.best) - 1
+
+    def update(self, pos, value):
+        best, left, right = self.best, self.left, self.right
+        path = []
+        node, lo, hi = 1, 0, self.size
+        for _ in range(self.depth):
+            path.append(node)
+            mid = (lo + hi) >> 1
+            if pos < mid:
+                child = left[node] or self._new_node()
+                left[node] = child
+                hi = mid
+            else:
+                child = right[node] or self._new_node()
+                right[node] = child
+                lo = mid
+            node = child
+        best[node] = value
+        for node in reversed(path):
+            a = best[left[node]]
+            b = best[right[node]]
+            best[node] = a if a >= b else b
+
+    def find_first(self, value):
+        """Return the leftmost slot whose value is >= value, or -1"""
+        best, left, right = self.best, self.left, self.right
+        if best[1] < value:
+            return -1
+        node, lo, hi = 1, 0, self.size
+        for _ in range(self.depth):
+            mid = (lo + hi) >> 1
+            child = left[node]
+            if child and best[child] >= value:
+                node, hi = child, mid
+            else:
+                node, lo = right[node], mid
+        return lo
+
+
+class Pattern(namedtuple('Pattern', ['lengths', 'counts', 'used', 'repeat'])):
+    """One cut pattern (lengths x counts) applied to `repeat` identical bars.
+
+    used is the bar length the pattern consumes: pieces plus kerf and trims.
+    """
+
+    __slots__ = ()
+
+    @property
+    def pieces(self):
+        """Piece lengths of a single bar, longest first"""
+        return np.repeat(self.lengths, self.counts).tolist()
+
+
+class StockUsage:
+    """Bars used for one profile, stored as cut patterns with repeat counts.
+
+    Iterating yields one ``(pieces, used_length)`` tuple per physical bar and
+    ``len()`` is the number of bars, so code written against the old list of
+    tuples keeps working; the bars are only expanded when iterated.
+    """
+
+    def __init__(self, patterns, lower_bound=None, kerf=0, trim_start=0, trim_end=0, oversized=0):
+        self.patterns = list(patterns)
+        # Minimum number of bars any plan needs, when the engine proved one
+        self.lower_bound = lower_bound
+        self.kerf = kerf
+        self.trim_start = trim_start
+        self.trim_end = trim_end
+        # Pieces longer than the bar minus its trims, each cut from a bar of its own
+        self.oversized = oversized
+
+    def __len__(self):
+        return sum(p.repeat for p in self.patterns)
+
+    def __bool__(self):
+        return bool(self.patterns)
+
+    def __iter__(self):
+        for pattern in self.patterns:
+            pieces = pattern.pieces
+            for _ in range(pattern.repeat):
+                yield list(pieces), pattern.used
+
+    def __repr__(self):
+        return f"StockUsage({len(self)} bars, {len(self.patterns)} patterns)"
+
+    def piece_count(self):
+        """Total number of pieces cut from all bars"""
+        return sum(int(p.counts.sum()) * p.repeat for p in self.patterns)
+
+    def used_length(self):
+        """Total length of all pieces cut from all bars"""
+        return sum(int((p.lengths * p.counts).sum()) * p.repeat for p in self.patterns)
+
+    def consumed_length(self):
+        """Total bar length consumed, including kerf and trims"""
+        return sum(p.used * p.repeat for p in self.patterns)
+
+
+def compress_pieces(pieces):
+    """Turn a flat list of piece lengths into (lengths, counts) arrays"""
+    lengths, counts = np.unique(np.asarray(pieces, dtype=np.int64), return_counts=True)
+    return lengths, counts
+
+
+class _BarGroup:
+    """`repeat` identical bars occupying bar indices start..start+repeat-1"""
+
+    __slots__ = ('start', 'repeat', 'remaining', 'cuts')
+
+    def __init__(self, start, repeat, remaining, cuts):
+        self.start = start
+        self.repeat = repeat
+        self.remaining = remaining
+        self.cuts = cuts
+
+    def split(self, n):
+        """Keep the first n bars and return the others as a new group"""
+        rest = _BarGroup(self.start + n, self.repeat - n, self.remaining, list(self.cuts))
+        self.repeat = n
+        return rest
+
+    def add(self, length, count):
+        self.cuts.append((length, count))
+        self.remaining -= length * count
+
+
+def _pack_groups(lengths, counts, stock_length, best_fit):
+    """Shared FFD/BFD loop over (length, count) demand.
+
+    Placing a whole run of one length at once is exact: once a bar is picked
+    for a length, both first fit and best fit keep choosing that same bar
+    until it is full, then move on to the next identical bar of its group.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    keep = (lengths > 0) & (counts > 0)
+    lengths, counts = lengths[keep], counts[keep]
+    order = np.argsort(-lengths, kind='stable')
+
+    groups = []
+    next_start = 0
+
+    if best_fit:
+        # Keyed by remaining length: the tightest bar is the leftmost fit
+        tree = SegmentTree(stock_length + 1)
+        buckets = {}
+
+        def take(length):
+            left = tree.find_first(length)
+            if left == -1:
+                return None
+            bucket = buckets[left]
+            group = bucket.pop()
+            if not bucket:
+                del buckets[left]
+                tree.update(left, -1)
+            return group
+
+        def attach(group):
+            left = group.remaining
+            if left not in buckets:
+                buckets[left] = []
+                tree.update(left, left)
+            buckets[left].append(group)
+    else:
+        # Keyed by bar index: the first bar that fits is the leftmost fit
+        tree = SegmentTree(int(counts.sum()) + 1)
+        by_start = {}
+
+        def take(length):
+            pos = tree.find_first(length)
+            return by_start[pos] if pos != -1 else None
+
+        def attach(group):
+            by_start[group.start] = group
+            tree.update(group.start, group.remaining)
+
+    for length, count in zip(lengths[order].tolist(), counts[order].tolist()):
+        if length > stock_length:
+            # Oversized pieces get a bar of their own, as they always have
+            groups.append(_BarGroup(next_start, count, stock_length - length, [(length, 1)]))
+            next_start += count
+            continue
+
+        while count:
+            group = take(length)
+            if group is None:
+                per_bar = stock_length // length
+                group = _BarGroup(next_start, -(-count // per_bar), stock_length, [])
+                next_start += group.repeat
+                groups.append(group)
+
+            per_bar = group.remaining // length
+            full = min(group.repeat, count // per_bar)
+            if full:
+                rest = None
+                if full < group.repeat:
+                    rest = group.split(full)
+                    groups.append(rest)
+                group.add(length, per_bar)
+                count -= full * per_bar
+                attach(group)
+                group = rest
+            if group is not None and count:
+                rest = None
+                if group.repeat > 1:
+                    rest = group.split(1)
+                    groups.append(rest)
+                group.add(length, count)
+                count = 0
+                attach(group)
+                group = rest
+            if group is not None:
+                attach(group)
+
+    return _collapse(groups)
+
+
+def _collapse(groups):
+    """Merge groups that ended up with the same cuts into Pattern records"""
+    merged = {}
+    for group in sorted(groups, key=lambda g: g.start):
+        key = tuple(group.cuts)
+        if key in merged:
+            merged[key] += group.repeat
+        else:
+            merged[key] = group.repeat
+
+    patterns = []
+    for cuts, repeat in merged.items():
+        lengths = np.array([length for length, _ in cuts], dtype=np.int64)
+        counts = np.array([count for _, count in cuts], dtype=np.int64)
+        used = int((lengths * counts).sum())
+        patterns.append(Pattern(lengths, counts, used, repeat))
+    return StockUsage(patterns)
+
+
+def first_fit_decreasing(lengths, counts, stock_length):
+    """Put every piece into the first open bar that still has room for it"""
+    return _pack_groups(lengths, counts, stock_length, best_fit=False)
+
+
+def best_fit_decreasing(lengths, counts, stock_length):
+    """Put every piece into the open bar that leaves the smallest offcut"""
+    return _pack_groups(lengths, counts, stock_length, best_fit=True)
+
+
+class _MasterLP:
+    """Restricted master LP min sum(x) s.t. columns @ x >= demand, x >= 0.
+
+    Columns are added one at a time as column generation finds them.
+    solve() uses SciPy/HiGHS when available and otherwise a revised primal
+    simplex that keeps its basis between solves: the previous optimum stays
+    feasible when a column is added, so each new pattern costs a few pivots
+    rather than a fresh solve. The first len(demand) columns must be the
+    homogeneous patterns, one per length, whose basis is feasible at once.
+    """
+
+    def __init__(self, columns, demand):
+        self.demand = np.asarray(demand, dtype=float)
+        self.matrix = np.array(columns, dtype=float).T
+        # Basic variables: pattern j as j, the surplus of item i as -1 - i
+        self.basis = list(range(len(self.demand)))
+
+    def add(self, column):
+        self.matrix = np.column_stack([self.matrix, np.asarray(column, dtype=float)])
+
+    def solve(self):
+        """Returns (objective, x, duals)"""
+        linprog = _highs_linprog()
+        if linprog is not None:
+            res = linprog(np.ones(self.matrix.shape[1]), A_ub=-self.matrix, b_ub=-self.demand,
+                          bounds=(0, None), method='highs')
+            if res.status == 0:
+                return res.fun, res.x, -res.ineqlin.marginals
+        return self._simplex()
+
+    def _basis_matrix(self):
+        m = len(self.demand)
+        basis_matrix = np.zeros((m, m))
+        for k, var in enumerate(self.basis):
+            if var >= 0:
+                basis_matrix[:, k] = self.matrix[:, var]
+            else:
+                basis_matrix[-1 - var, k] = -1.0
+        return basis_matrix
+
+    def _simplex(self):
+        eps = 1e-9
+        m, n = self.matrix.shape
+        # Candidate q is pattern q below n and the surplus of item q - n above
+        order = lambda var: var if var >= 0 else n - 1 - var
+        stalled = 0
+
+        while True:
+            inverse = np.linalg.inv(self._basis_matrix())
+            x_basic = np.maximum(inverse @ self.demand, 0.0)
+            costs = np.array([1.0 if var >= 0 else 0.0 for var in self.basis])
+            duals = costs @ inverse
+            # Reduced costs: 1 - duals.column for patterns, duals[i] for surpluses
+            reduced = np.concatenate([1.0 - duals @ self.matrix, duals])
+            candidates = np.flatnonzero(reduced < -eps)
+            if not len(candidates):
+                break
+            if stalled < 50:
+                # Dantzig's rule: most negative reduced cost
+                q = int(candidates[reduced[candidates].argmin()])
+            else:
+                # Bland's rule after a run of degenerate pivots, so no cycling
+                q = int(candidates[0])
+            if q < n:
+                var, column = q, self.matrix[:, q]
+            else:
+                var, column = n - 1 - q, -np.eye(m)[q - n]
+
+            direction = inverse @ column
+            rows = np.flatnonzero(direction > eps)
+            if not len(rows):
+                raise RuntimeError("Master LP is unbounded")
+            ratios = x_basic[rows] / direction[rows]
+            best = ratios.min()
+            ties = rows[ratios <= best + eps]
+            row = min(ties, key=lambda r: order(self.basis[r]))
+            stalled = stalled + 1 if best <= eps else 0
+            self.basis[row] = var
+
+        x = np.zeros(n)
+        for value, var in zip(x_basic, self.basis):
+            if var >= 0:
+                x[var] = value
+        return float(x.sum()), x, duals
+
+
+def _price_pattern(lengths, bounds, values, capacity):
+    """Bounded knapsack: the pattern with the highest total dual value.
+
+    Bounds are split into binary chunks (1, 2, 4, ...) and every chunk is a
+    0/1 item, so each is one vectorized pass over the capacity axis.
+    """
+    dp = np.zeros(capacity + 1)
+    chunks = []
+    for item, (length, bound, value) in enumerate(zip(lengths, bounds, values)):
+        if value <= 1e-12:
+            continue
+        step = 1
+        while bound > 0:
+            mult = min(step, bound)
+            weight = length * mult
+            if weight <= capacity:
+                candidate = dp[:-weight] + value * mult
+                better = candidate > dp[weight:] + 1e-12
+                dp[weight:] = np.where(better, candidate, dp[weight:])
+                chunks.append((item, mult, weight, better))
+            bound -= mult
+            step <<= 1
+
+    pattern = np.zeros(len(lengths), dtype=np.int64)
+    c = capacity
+    for item, mult, weight, better in reversed(chunks):
+        if c >= weight and better[c - weight]:
+            pattern[item] += mult
+            c -= weight
+    return dp[capacity], pattern
+
+
+def optimal_cutting(lengths, counts, stock_length, max_iterations=500):
+    """Near-optimal plan from column generation over the cutting-stock LP.
+
+    Patterns are priced with a bounded knapsack, the LP solution is rounded
+    down and whatever demand is left goes through FFD. The returned
+    StockUsage carries the LP lower bound (ceil of the LP optimum, or of
+    Farley's bound if max_iterations runs out first), and the
+    plain FFD plan is kept instead if it happens to use fewer bars.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    keep = (lengths > 0) & (counts > 0)
+    lengths, counts = lengths[keep], counts[keep]
+    order = np.argsort(-lengths, kind='stable')
+    lengths, counts = lengths[order], counts[order]
+
+    heuristic = first_fit_decreasing(lengths, counts, stock_length)
+    fits = lengths <= stock_length
+    if not fits.any():
+        heuristic.lower_bound = len(heuristic)
+        return heuristic
+
+    # Oversized pieces cannot share a bar, the LP only sees the rest
+    item_lengths, demand = lengths[fits], counts[fits]
+    oversized = _pack_groups(lengths[~fits], counts[~fits], stock_length, best_fit=False)
+
+    # Work in gcd units to shrink the knapsack's capacity axis
+    unit = math.gcd(*item_lengths.tolist())
+    scaled = item_lengths // unit
+    capacity = stock_length // unit
+    bounds = np.minimum(demand, capacity // scaled)
+
+    # Start from one homogeneous pattern per length plus the FFD patterns
+    index = {length: i for i, length in enumerate(item_lengths.tolist())}
+    columns = list(np.diag(bounds))
+    for pattern in heuristic.patterns:
+        column = np.zeros(len(item_lengths), dtype=np.int64)
+        for length, count in zip(pattern.lengths.tolist(), pattern.counts.tolist()):
+            if length in index:
+                column[index[length]] = count
+        columns.append(column)
+    unique = {}
+    for column in columns:
+        if column.any():
+            unique.setdefault(tuple(column.tolist()), column)
+    seen = set(unique)
+    columns = list(unique.values())
+
+    master = _MasterLP(columns, demand)
+    for _ in range(max_iterations):
+        objective, x, duals = master.solve()
+        value, pattern = _price_pattern(scaled.tolist(), bounds.tolist(), duals.tolist(), capacity)
+        key = tuple(pattern.tolist())
+        if value <= 1 + 1e-9 or key in seen:
+            break
+        seen.add(key)
+        columns.append(pattern)
+        master.add(pattern)
+
+    # The restricted master only bounds the LP from above until pricing finds
+    # no improving pattern; Farley's bound objective / value stays valid when
+    # column generation stops early, and equals the LP optimum once value <= 1
+    lower_bound = math.ceil(objective / max(value, 1.0) - 1e-6) + len(oversized)
+
+    # Round down, never producing more than the demand, then FFD the rest
+    residual = demand.copy()
+    cuts = []
+    for j in np.argsort(-x, kind='stable'):
+        repeat = int(math.floor(x[j] + 1e-9))
+        column = columns[j]
+        used = column > 0
+        if repeat <= 0 or not used.any():
+            continue
+        repeat = min(repeat, int((residual[used] // column[used]).min()))
+        if repeat > 0:
+            residual -= column * repeat
+            cuts.append((column, repeat))
+
+    patterns = list(oversized.patterns)
+    for column, repeat in cuts:
+        used = column > 0
+        pattern_lengths = item_lengths[used]
+        pattern_counts = column[used]
+        patterns.append(Pattern(pattern_lengths, pattern_counts,
+                                int((pattern_lengths * pattern_counts).sum()), repeat))
+    patterns.extend(first_fit_decreasing(item_lengths, residual, stock_length).patterns)
+
+    merged = {}
+    for pattern in patterns:
+        key = (tuple(pattern.lengths.tolist()), tuple(pattern.counts.tolist()))
+        if key in merged:
+            merged[key] = merged[key]._replace(repeat=merged[key].repeat + pattern.repeat)
+        else:
+            merged[key] = pattern
+    result = StockUsage(merged.values(), lower_bound=lower_bound)
+
+    if len(heuristic) < len(result):
+        heuristic.lower_bound = lower_bound
+        return heuristic
+    return result
+
+
+ENGINES = {
+    'ffd': first_fit_decreasing,
+    'bfd': best_fit_decreasing,
+    'optimal': optimal_cutting,
+}
+
+
+def _unfold(usage, kerf, trim_start, trim_end):
+    """Map a plan packed on kerf-folded lengths back to real piece lengths"""
+    patterns = []
+    for pattern in usage.patterns:
+        lengths = pattern.lengths - kerf
+        cuts = int(pattern.counts.sum()) - 1
+        used = trim_start + int((lengths * pattern.counts).sum()) + cuts * kerf + trim_end
+        patterns.append(Pattern(lengths, pattern.counts, used, pattern.repeat))
+    return StockUsage(patterns, usage.lower_bound, kerf, trim_start, trim_end)
+
+
+def pack(lengths, counts, stock_length, mode='ffd', kerf=0, trim_start=0, trim_end=0):
+    """Pack (length, count) demand into bars of stock_length with the selected engine.
+
+    Kerf and trims are folded into the demand instead of being checked per
+    piece: every piece occupies length + kerf of a bar whose capacity is
+    stock_length - trims + kerf, i.e. n pieces need n - 1 saw cuts. They are
+    rounded up to whole millimetres so a plan never overfills a bar.
+
+    The one exception is a piece longer than stock_length - trims: it gets a
+    bar of its own whose used length counts the trims anyway, so that bar is
+    overfilled. The number of such pieces is returned in usage.oversized for
+    the caller to report.
+    """
+    try:
+        engine = ENGINES[mode]
+    except KeyError:
+        raise ValueError(f"Unknown packing mode: {mode}")
+
+    kerf = int(math.ceil(kerf))
+    trim_start = int(math.ceil(trim_start))
+    trim_end = int(math.ceil(trim_end))
+    lengths = np.asarray(lengths, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    usable = int(stock_length) - trim_start - trim_end
+    oversized = int(counts[(lengths > usable) & (counts > 0)].sum())
+
+    if not (kerf or trim_start or trim_end):
+        usage = engine(lengths, counts, int(stock_length))
+    else:
+        capacity = usable + kerf
+        usage = _unfold(engine(lengths + kerf, counts, capacity), kerf, trim_start, trim_end)
+    usage.oversized = oversized
+    return usage
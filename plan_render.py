@@ -0,0 +1,249 @@
+"""Direct vector rendering of cutting plans, without matplotlib.
+
+Bars and piece labels are drawn straight from each profile's cut patterns:
+a pattern is drawn once (an SVG <symbol>, a PDF form XObject) and placed
+for each of its repeated bars. Output is written page by page on A4
+landscape, so memory does not grow with the number of bars. The PDF is
+written directly rather than through reportlab, whose canvas keeps every
+page until it is saved.
+"""
+from xml.sax.saxutils import escape, quoteattr
+import zlib
+
+from co import _cut_patterns, _piece_offsets
+
+# Page geometry in points (A4 landscape)
+PAGE_WIDTH, PAGE_HEIGHT = 842, 595
+MARGIN = 30
+HEADER = 28  # title band at the top of each page
+NUMBER_WIDTH = 36  # bar numbers left of the bars
+ROW = 18
+BAR_HEIGHT = 14
+BARS_PER_PAGE = (PAGE_HEIGHT - 2 * MARGIN - HEADER) // ROW
+
+# Pieces narrower than this (in points) are drawn without their length
+MIN_LABEL_WIDTH = 22
+
+STOCK_COLOR = '#808080'
+PIECE_COLOR = '#1f4fd1'
+LABEL_COLOR = '#ffffff'
+
+
+def _fmt(value):
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+
+def _pages(results, bars_per_page):
+    """Yield each page as (profile_number, profile, stock_length, bars, page, page_count, rows).
+
+    rows lists (bar_number, pattern_number) for the page; bars are never
+    expanded beyond one page at a time.
+    """
+    for number, (profile, stock_length, stock_used) in enumerate(results):
+        patterns = _cut_patterns(stock_used)
+        bars = sum(repeat for _, _, repeat in patterns)
+        page_count = max(1, -(-bars // bars_per_page))
+        rows, page, bar = [], 1, 0
+        for pattern_number, (_, _, repeat) in enumerate(patterns):
+            for _ in range(repeat):
+                bar += 1
+                rows.append((bar, pattern_number))
+                if len(rows) == bars_per_page:
+                    yield number, profile, stock_length, bars, page, page_count, rows
+                    rows, page = [], page + 1
+        if rows or bars == 0:
+            yield number, profile, stock_length, bars, page, page_count, rows
+
+
+def _title(profile, bars, page, page_count, rows):
+    if not rows:
+        return f"Profile {profile}: no bars"
+    return f"Profile {profile}: bars {rows[0][0]}-{rows[-1][0]} of {bars} (page {page}/{page_count})"
+
+
+def write_plan_svg(results, path, bars_per_page=BARS_PER_PAGE):
+    """Write the cutting plan as one SVG with its pages stacked vertically.
+
+    Each cut pattern becomes a <symbol> drawn once and placed with <use>
+    for every bar that repeats it.
+    """
+    page_count = sum(max(1, -(-len(stock_used) // bars_per_page)) for _, _, stock_used in results)
+    bar_width = PAGE_WIDTH - 2 * MARGIN - NUMBER_WIDTH
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                f'width="{PAGE_WIDTH}pt" height="{PAGE_HEIGHT * page_count}pt" '
+                f'viewBox="0 0 {PAGE_WIDTH} {PAGE_HEIGHT * page_count}" '
+                f'font-family="Helvetica, Arial, sans-serif">\n')
+
+        defined = None
+        for page_index, (number, profile, stock_length, bars, page, pages, rows) in enumerate(
+                _pages(results, bars_per_page)):
+            if defined != number:
+                # Symbols for this profile's patterns, written before its first page
+                defined = number
+                stock_used = results[number][2]
+                kerf = getattr(stock_used, 'kerf', 0)
+                trim_start = getattr(stock_used, 'trim_start', 0)
+                scale = bar_width / stock_length
+                f.write('<defs>\n')
+                for pattern_number, (pieces, used, _) in enumerate(_cut_patterns(stock_used)):
+                    f.write(f'<symbol id="p{number}_{pattern_number}" overflow="visible">'
+                            f'<rect width="{_fmt(bar_width)}" height="{BAR_HEIGHT}" fill="{STOCK_COLOR}" '
+                            f'stroke="#000" stroke-width="0.5"/>')
+                    for offset, piece in zip(_piece_offsets(pieces, kerf, trim_start), pieces):
+                        x, width = offset * scale, piece * scale
+                        f.write(f'<rect x="{_fmt(x)}" width="{_fmt(width)}" height="{BAR_HEIGHT}" '
+                                f'fill="{PIECE_COLOR}" stroke="#000" stroke-width="0.5"/>')
+                        if width >= MIN_LABEL_WIDTH:
+                            f.write(f'<text x="{_fmt(x + width / 2)}" y="{BAR_HEIGHT - 4}" font-size="7" '
+                                    f'text-anchor="middle" fill="{LABEL_COLOR}">{_fmt(piece)}</text>')
+                    f.write('</symbol>\n')
+                f.write('</defs>\n')
+
+            top = page_index * PAGE_HEIGHT
+            f.write(f'<g transform="translate(0,{top})">\n')
+            f.write(f'<rect width="{PAGE_WIDTH}" height="{PAGE_HEIGHT}" fill="#fff"/>\n')
+            f.write(f'<text x="{MARGIN}" y="{MARGIN + 14}" font-size="12" font-weight="bold">'
+                    f'{escape(_title(profile, bars, page, pages, rows))}</text>\n')
+            for row, (bar, pattern_number) in enumerate(rows):
+                y = MARGIN + HEADER + row * ROW
+                f.write(f'<text x="{MARGIN + NUMBER_WIDTH - 6}" y="{y + BAR_HEIGHT - 4}" font-size="8" '
+                        f'text-anchor="end">{bar}</text>'
+                        f'<use xlink:href={quoteattr(f"#p{number}_{pattern_number}")} '
+                        f'x="{MARGIN + NUMBER_WIDTH}" y="{y}"/>\n')
+            f.write('</g>\n')
+
+        f.write('</svg>\n')
+
+
+def _rgb(color):
+    """PDF colour operands of a '#rrggbb' colour"""
+    return ' '.join(_fmt(int(color[i:i + 2], 16) / 255) for i in (1, 3, 5))
+
+
+def _pdf_text(text):
+    """A PDF string literal in WinAnsiEncoding; unsupported characters become '?'"""
+    data = text.encode('cp1252', 'replace')
+    return b'(' + data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _label_width(text, size):
+    """Helvetica width of a piece length or bar number"""
+    return sum(HELVETICA_WIDTHS.get(char, 556) for char in text) * size / 1000
+
+
+# Helvetica advance widths (1/1000 em) of the characters in lengths and bar numbers
+HELVETICA_WIDTHS = {**dict.fromkeys('0123456789', 556), '.': 278, '-': 333}
+
+
+class _PdfWriter:
+    """Bare PDF 1.4 writer: each object goes to disk as it is added and only
+    its offset is kept, so memory does not grow with the document."""
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets = []
+        f.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def reserve(self):
+        """Number an object now and write it later, for forward references"""
+        self.offsets.append(None)
+        return len(self.offsets)
+
+    def add(self, body, number=None):
+        if number is None:
+            number = self.reserve()
+        self.offsets[number - 1] = self.f.tell()
+        self.f.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+        return number
+
+    def add_stream(self, header, data, number=None):
+        data = zlib.compress(data)
+        return self.add(b'<< ' + header + b' /Length %d /Filter /FlateDecode >>\nstream\n' % len(data)
+                        + data + b'\nendstream', number)
+
+    def close(self, root):
+        xref = self.f.tell()
+        self.f.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(self.offsets) + 1))
+        self.f.write(b''.join(b'%010d 00000 n \n' % offset for offset in self.offsets))
+        self.f.write(b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                     % (len(self.offsets) + 1, root, xref))
+
+
+def write_plan_pdf(results, path, bars_per_page=BARS_PER_PAGE):
+    """Write the cutting plan as a PDF, streamed to disk page by page.
+
+    Each cut pattern becomes a form XObject drawn once and placed for every
+    bar that repeats it. The PDF is written directly, without reportlab,
+    using the built-in Helvetica fonts.
+    """
+    bar_width = PAGE_WIDTH - 2 * MARGIN - NUMBER_WIDTH
+    stroke = _rgb('#000000').encode()
+    stock_fill, piece_fill, label_fill = (_rgb(color).encode() for color in (STOCK_COLOR, PIECE_COLOR, LABEL_COLOR))
+
+    with open(path, 'wb') as f:
+        pdf = _PdfWriter(f)
+        pages_ref = pdf.reserve()
+        regular = pdf.add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>')
+        bold = pdf.add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+        fonts = b'/Font << /F1 %d 0 R /F2 %d 0 R >>' % (regular, bold)
+        kids = []
+
+        defined, forms = None, []
+        for number, profile, stock_length, bars, page, pages, rows in _pages(results, bars_per_page):
+            if defined != number:
+                # This profile's patterns, written before its first page
+                defined, forms = number, []
+                stock_used = results[number][2]
+                kerf = getattr(stock_used, 'kerf', 0)
+                trim_start = getattr(stock_used, 'trim_start', 0)
+                scale = bar_width / stock_length
+                for pieces, used, _ in _cut_patterns(stock_used):
+                    lefts = [offset * scale for offset in _piece_offsets(pieces, kerf, trim_start).tolist()]
+                    widths = [piece * scale for piece in pieces]
+                    ops = [b'0.5 w %s RG %s rg 0 0 %s %d re B' % (stroke, stock_fill, _fmt(bar_width).encode(),
+                                                                   BAR_HEIGHT)]
+                    # All pieces as one path, then all labels in one text object
+                    ops.append(piece_fill + b' rg')
+                    ops.extend(b'%s 0 %s %d re' % (_fmt(x).encode(), _fmt(width).encode(), BAR_HEIGHT)
+                               for x, width in zip(lefts, widths))
+                    ops.append(b'B BT /F1 7 Tf ' + label_fill + b' rg')
+                    for x, width, piece in zip(lefts, widths, pieces):
+                        if width >= MIN_LABEL_WIDTH:
+                            label = _fmt(piece)
+                            ops.append(b'1 0 0 1 %s 4 Tm %s Tj' % (
+                                _fmt(x + width / 2 - _label_width(label, 7) / 2).encode(), _pdf_text(label)))
+                    ops.append(b'ET')
+                    forms.append(pdf.add_stream(
+                        b'/Type /XObject /Subtype /Form /BBox [0 0 %s %d] /Resources << %s >>'
+                        % (_fmt(bar_width).encode(), BAR_HEIGHT, fonts),
+                        b'\n'.join(ops)))
+
+            ops = [b'0 g BT /F2 12 Tf 1 0 0 1 %d %d Tm %s Tj ET' % (
+                MARGIN, PAGE_HEIGHT - MARGIN - 14, _pdf_text(_title(profile, bars, page, pages, rows)))]
+            ops.append(b'BT /F1 8 Tf')
+            for row, (bar, _) in enumerate(rows):
+                # PDF y grows upwards, rows go down the page
+                y = PAGE_HEIGHT - MARGIN - HEADER - row * ROW - BAR_HEIGHT
+                label = str(bar)
+                ops.append(b'1 0 0 1 %s %d Tm %s Tj' % (
+                    _fmt(MARGIN + NUMBER_WIDTH - 6 - _label_width(label, 8)).encode(), y + 4, _pdf_text(label)))
+            ops.append(b'ET')
+            for row, (_, pattern_number) in enumerate(rows):
+                y = PAGE_HEIGHT - MARGIN - HEADER - row * ROW - BAR_HEIGHT
+                ops.append(b'q 1 0 0 1 %d %d cm /P%d Do Q' % (MARGIN + NUMBER_WIDTH, y, pattern_number))
+
+            used = sorted({pattern_number for _, pattern_number in rows})
+            xobjects = b' '.join(b'/P%d %d 0 R' % (n, forms[n]) for n in used)
+            content = pdf.add_stream(b'', b'\n'.join(ops))
+            kids.append(pdf.add(
+                b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R '
+                b'/Resources << %s /XObject << %s >> >> >>'
+                % (pages_ref, PAGE_WIDTH, PAGE_HEIGHT, content, fonts, xobjects)))
+
+        pdf.add(b'<< /Type /Pages /Kids [%s] /Count %d >>'
+                % (b' '.join(b'%d 0 R' % kid for kid in kids), len(kids)), pages_ref)
+        root = pdf.add(b'<< /Type /Catalog /Pages %d 0 R >>' % pages_ref)
+        pdf.close(root)
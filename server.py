@@ -0,0 +1,461 @@
+"""Local HTTP optimization service.
+
+Lets several workstations share one optimizer: clients submit work as
+jobs, poll their status and download the generated files. Built on asyncio
+and the standard library only, with packing and exports running in a
+process pool:
+
+    python server.py --port 8765 --workers 4
+
+Endpoints:
+
+    POST /jobs                     submit a job, returns 202 with its id
+    GET  /jobs/<id>                status, summary and download links
+    GET  /jobs/<id>/files/<path>   download one generated file
+    GET  /health                   queue and worker counts
+
+A job is either a JSON document
+
+    {"demand": [{"profile": "HEA180", "length": 2500, "quantity": 4, "weight": 51.2}],
+     "settings": {"HEA180": 12000}, "default_length": 12000, "mode": "ffd",
+     "kerf": 3, "artifacts": ["plan-excel", "invoice-pdf"]}
+
+or a work file uploaded as the raw request body, with the same options in
+the query string: POST /jobs?filename=order.xlsx&kerf=3&artifacts=invoice-pdf
+
+Identical requests submitted while one is still queued or running share
+that job instead of being packed twice. When the queue is full new jobs
+are refused with 503.
+"""
+import argparse
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import hashlib
+from http import HTTPStatus
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+import uuid
+
+import pandas as pd
+
+import cli
+import co
+
+# Options a job may set, with the type each value is converted to
+NUMERIC_OPTIONS = {
+    'default_length': int,
+    'kerf': float,
+    'trim_start': float,
+    'trim_end': float,
+    'weight_error': float,
+    'steel_price': float
+}
+
+# Bytes read and sent at a time when a file is downloaded
+DOWNLOAD_CHUNK = 256 * 1024
+
+
+class BadRequest(Exception):
+    """Invalid job submission, answered with 400"""
+
+
+def _job_options(values):
+    """Validate submitted options and fill in the command-line defaults"""
+    defaults = cli.parse_args(['-'])
+    options = {
+        'mode': defaults.mode,
+        'language': defaults.language,
+        'artifacts': list(defaults.artifacts),
+        'default_length': cli.DEFAULT_LENGTH,
+        'kerf': defaults.kerf,
+        'trim_start': defaults.trim_start,
+        'trim_end': defaults.trim_end,
+        'weight_error': defaults.weight_error,
+        'steel_price': defaults.steel_price,
+        'settings': {}
+    }
+    for name, convert in NUMERIC_OPTIONS.items():
+        if name in values:
+            try:
+                options[name] = convert(values[name])
+            except (TypeError, ValueError):
+                raise BadRequest(f"{name} must be a number")
+
+    if 'mode' in values:
+        if values['mode'] not in co.packing.ENGINES:
+            raise BadRequest(f"mode must be one of {list(co.packing.ENGINES)}")
+        options['mode'] = values['mode']
+    if 'language' in values:
+        if values['language'] not in ('en', 'fr', 'ar'):
+            raise BadRequest("language must be en, fr or ar")
+        options['language'] = values['language']
+    if 'artifacts' in values:
+        artifacts = values['artifacts']
+        if isinstance(artifacts, str):
+            artifacts = [name for name in artifacts.split(',') if name]
+        unknown = set(artifacts) - set(cli.ARTIFACTS)
+        if unknown:
+            raise BadRequest(f"Unknown artifacts {sorted(unknown)}, expected some of {cli.ARTIFACTS}")
+        options['artifacts'] = [name for name in cli.ARTIFACTS if name in artifacts]
+    if 'settings' in values:
+        settings = values['settings']
+        if not isinstance(settings, dict):
+            raise BadRequest("settings must map profile names to stock lengths")
+        try:
+            options['settings'] = {str(profile): int(length) for profile, length in settings.items()}
+        except (TypeError, ValueError):
+            raise BadRequest("settings must map profile names to stock lengths")
+    return options
+
+
+def _demand_csv(rows):
+    """Turn JSON demand rows into a work file that co.load_demand reads"""
+    if not isinstance(rows, list) or not rows:
+        raise BadRequest("demand must be a non-empty list")
+    output = io.StringIO()
+    writer = csv.writer(output, delimiter=';')
+    writer.writerow(['Profil', 'Qté', 'Long.', 'Poids'])
+    for row in rows:
+        try:
+            writer.writerow([str(row['profile']), int(row.get('quantity', 1)), int(row['length']),
+                             float(row.get('weight', 0))])
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise BadRequest("each demand row needs a profile and a numeric length")
+    return output.getvalue().encode('utf-8')
+
+
+def _run_job(job_dir, input_name, payload, options):
+    """Process pool entry point: write the input into job_dir and run it there"""
+    input_path = os.path.join(job_dir, input_name)
+    with open(input_path, 'wb') as f:
+        f.write(payload)
+
+    args = cli.parse_args([input_path])
+    args.output_dir = job_dir
+    args.workers = 1
+    for name in ('mode', 'language', 'artifacts', 'kerf', 'trim_start', 'trim_end', 'weight_error', 'steel_price'):
+        setattr(args, name, options[name])
+    settings_df = pd.DataFrame({
+        'Profile': list(options['settings']),
+        'Stock Length': list(options['settings'].values())
+    })
+    return cli.process_file(input_path, settings_df, options['default_length'], args)
+
+
+class Job:
+    def __init__(self, job_id, input_hash, input_name, payload, options, job_dir):
+        self.id = job_id
+        self.input_hash = input_hash
+        self.input_name = input_name
+        self.payload = payload
+        self.options = options
+        self.dir = job_dir
+        self.status = 'queued'
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.summary = None
+
+    def describe(self):
+        description = {
+            'id': self.id,
+            'status': self.status,
+            'input_hash': self.input_hash,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished
+        }
+        if self.summary is not None:
+            summary = dict(self.summary)
+            summary['file'] = self.input_name
+            summary['outputs'] = [
+                f"/jobs/{self.id}/files/{os.path.relpath(path, self.dir).replace(os.sep, '/')}"
+                for path in summary.get('outputs', [])
+            ]
+            description['summary'] = summary
+        return description
+
+
+class OptimizationService:
+    """Bounded job queue in front of a process pool.
+
+    One dispatcher task per worker takes jobs off the queue, so at most
+    `workers` jobs run at once and at most `queue_size` wait.
+    """
+
+    def __init__(self, data_dir, workers=2, queue_size=64, keep_finished=500):
+        self.data_dir = data_dir
+        self.workers = workers
+        self.keep_finished = keep_finished
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.jobs = {}
+        self.finished = OrderedDict()  # finished job ids, oldest first
+        self.in_flight = {}  # input hash -> id of the queued or running job
+        self.running = 0
+        self.pool = None
+        self.dispatchers = []
+
+    def start(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        # No artifacts preloaded: matplotlib is imported by the first job that draws a plan
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=cli._init_worker,
+                                        initargs=((),))
+        self.dispatchers = [asyncio.ensure_future(self._dispatch()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        self.pool.shutdown(wait=False)
+
+    def submit(self, input_name, payload, options):
+        """Queue a job, or return the in-flight job with the same input; None if the queue is full"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps([input_name.rsplit('.', 1)[-1].lower(), options], sort_keys=True).encode('utf-8'))
+        digest.update(payload)
+        input_hash = digest.hexdigest()
+
+        if input_hash in self.in_flight:
+            return self.jobs[self.in_flight[input_hash]], True
+
+        job_id = uuid.uuid4().hex
+        job = Job(job_id, input_hash, input_name, payload, options, os.path.join(self.data_dir, job_id))
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            return None, False
+        self.jobs[job_id] = job
+        self.in_flight[input_hash] = job_id
+        return job, False
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job.status = 'running'
+            job.started = time.time()
+            self.running += 1
+            try:
+                os.makedirs(job.dir, exist_ok=True)
+                job.summary = await loop.run_in_executor(self.pool, _run_job, job.dir, job.input_name,
+                                                         job.payload, job.options)
+                job.status = 'done' if job.summary.get('status') == 'ok' else 'failed'
+            except Exception as e:
+                job.summary = {'status': 'failed', 'error': str(e)}
+                job.status = 'failed'
+            finally:
+                self.running -= 1
+                job.finished = time.time()
+                job.payload = None
+                self.in_flight.pop(job.input_hash, None)
+                self._retire(job)
+                self.queue.task_done()
+
+    def _retire(self, job):
+        """Keep the newest finished jobs, deleting the files of older ones"""
+        self.finished[job.id] = None
+        while len(self.finished) > self.keep_finished:
+            old_id, _ = self.finished.popitem(last=False)
+            old = self.jobs.pop(old_id)
+            shutil.rmtree(old.dir, ignore_errors=True)
+
+    def health(self):
+        return {
+            'queued': self.queue.qsize(),
+            'running': self.running,
+            'workers': self.workers,
+            'queue_size': self.queue.maxsize
+        }
+
+
+class HTTPServer:
+    """Minimal HTTP/1.1 front end: one request per connection"""
+
+    def __init__(self, service, max_body=50 * 1024 * 1024):
+        self.service = service
+        self.max_body = max_body
+
+    async def handle(self, reader, writer):
+        try:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return
+            lines = head.decode('latin1').split('\r\n')
+            try:
+                method, target, _ = lines[0].split(' ', 2)
+            except ValueError:
+                await self._send_json(writer, HTTPStatus.BAD_REQUEST, {'error': 'Malformed request line'})
+                return
+            headers = {}
+            for line in lines[1:]:
+                if ':' in line:
+                    name, value = line.split(':', 1)
+                    headers[name.strip().lower()] = value.strip()
+
+            try:
+                length = int(headers.get('content-length', 0) or 0)
+            except ValueError:
+                length = -1
+            if length < 0:
+                await self._send_json(writer, HTTPStatus.BAD_REQUEST, {'error': 'Invalid Content-Length'})
+                return
+            if length > self.max_body:
+                await self._send_json(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {'error': 'Request body too large'})
+                return
+            body = await reader.readexactly(length) if length else b''
+
+            await self.route(writer, method, target, headers, body)
+        except Exception as e:
+            await self._send_json(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)})
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def route(self, writer, method, target, headers, body):
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split('/') if part]
+
+        if method == 'GET' and parts == ['health']:
+            await self._send_json(writer, HTTPStatus.OK, self.service.health())
+        elif method == 'POST' and parts == ['jobs']:
+            await self.submit(writer, url, headers, body)
+        elif method == 'GET' and len(parts) == 2 and parts[0] == 'jobs':
+            job = self.service.jobs.get(parts[1])
+            if job is None:
+                await self._send_json(writer, HTTPStatus.NOT_FOUND, {'error': 'Unknown job'})
+            else:
+                await self._send_json(writer, HTTPStatus.OK, job.describe())
+        elif method == 'GET' and len(parts) >= 4 and parts[0] == 'jobs' and parts[2] == 'files':
+            await self.download(writer, parts[1], '/'.join(parts[3:]))
+        else:
+            await self._send_json(writer, HTTPStatus.NOT_FOUND, {'error': 'Not found'})
+
+    async def submit(self, writer, url, headers, body):
+        try:
+            if headers.get('content-type', '').split(';')[0].strip() == 'application/json':
+                try:
+                    document = json.loads(body)
+                except ValueError:
+                    raise BadRequest("Body is not valid JSON")
+                if not isinstance(document, dict):
+                    raise BadRequest("Body must be a JSON object")
+                options = _job_options(document)
+                input_name, payload = 'demand.csv', _demand_csv(document.get('demand'))
+            else:
+                query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                input_name = os.path.basename(query.pop('filename', ''))
+                if not input_name.lower().endswith(cli.WORK_FILE_EXTENSIONS):
+                    raise BadRequest(f"filename must end with one of {list(cli.WORK_FILE_EXTENSIONS)}")
+                if not body:
+                    raise BadRequest("Upload the work file as the request body")
+                if 'settings' in query:
+                    try:
+                        query['settings'] = json.loads(query['settings'])
+                    except ValueError:
+                        raise BadRequest("settings must be a JSON object")
+                options = _job_options(query)
+                payload = body
+        except BadRequest as e:
+            await self._send_json(writer, HTTPStatus.BAD_REQUEST, {'error': str(e)})
+            return
+
+        job, deduplicated = self.service.submit(input_name, payload, options)
+        if job is None:
+            await self._send_json(writer, HTTPStatus.SERVICE_UNAVAILABLE, {'error': 'Job queue is full'},
+                                  {'Retry-After': '5'})
+            return
+        description = job.describe()
+        description['deduplicated'] = deduplicated
+        await self._send_json(writer, HTTPStatus.ACCEPTED, description, {'Location': f"/jobs/{job.id}"})
+
+    async def download(self, writer, job_id, name):
+        job = self.service.jobs.get(job_id)
+        outputs = job.summary.get('outputs', []) if job is not None and job.summary else []
+        # Only files the job reported writing can be downloaded
+        paths = {os.path.relpath(path, job.dir).replace(os.sep, '/'): path for path in outputs}
+        if name not in paths or not os.path.exists(paths[name]):
+            await self._send_json(writer, HTTPStatus.NOT_FOUND, {'error': 'Unknown file'})
+            return
+
+        # Read in the default executor and send in chunks, so a large file
+        # neither blocks the event loop nor sits in memory whole
+        loop = asyncio.get_running_loop()
+        f = await loop.run_in_executor(None, open, paths[name], 'rb')
+        try:
+            size = os.fstat(f.fileno()).st_size
+            self._write_head(writer, HTTPStatus.OK, 'application/octet-stream', size,
+                             {'Content-Disposition': f'attachment; filename="{os.path.basename(name)}"'})
+            while True:
+                chunk = await loop.run_in_executor(None, f.read, DOWNLOAD_CHUNK)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        finally:
+            f.close()
+
+    async def _send_json(self, writer, status, document, headers=None):
+        body = json.dumps(document, ensure_ascii=False).encode('utf-8')
+        await self._send(writer, status, body, 'application/json; charset=utf-8', headers)
+
+    async def _send(self, writer, status, body, content_type, headers=None):
+        self._write_head(writer, status, content_type, len(body), headers)
+        writer.write(body)
+        await writer.drain()
+
+    def _write_head(self, writer, status, content_type, length, headers=None):
+        lines = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {length}",
+            "Connection: close"
+        ]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin1'))
+
+
+async def serve(host, port, data_dir, workers, queue_size, max_body):
+    service = OptimizationService(data_dir, workers, queue_size)
+    service.start()
+    http = HTTPServer(service, max_body)
+    server = await asyncio.start_server(http.handle, host, port)
+    print(f"Serving on http://{host}:{port} with {workers} workers, jobs in {data_dir}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='server.py', description='Local HTTP optimization service.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help='Jobs run at the same time (default: one per CPU)')
+    parser.add_argument('--queue-size', type=int, default=64, help='Jobs that may wait before 503 (default: 64)')
+    parser.add_argument('--max-upload-mb', type=int, default=50, help='Largest accepted request body (default: 50)')
+    parser.add_argument('--data-dir', help='Where job inputs and outputs are kept (default: a temporary directory)')
+    args = parser.parse_args(argv)
+
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix='cutting-optimizer-jobs-')
+    try:
+        asyncio.run(serve(args.host, args.port, data_dir, args.workers, args.queue_size,
+                          args.max_upload_mb * 1024 * 1024))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
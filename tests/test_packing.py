@@ -0,0 +1,124 @@
+"""Packing engines against naive references and their own guarantees."""
+import random
+from collections import Counter
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import packing
+
+SEEDS = range(20)
+
+
+def random_demand(seed, oversized=False):
+    """(lengths, counts, stock_length) with distinct lengths"""
+    rng = random.Random(seed)
+    stock_length = rng.choice([3000, 6000, 12000])
+    top = stock_length + 500 if oversized else stock_length
+    lengths = rng.sample(range(100, top), rng.randint(1, 12))
+    counts = [rng.randint(1, 8) for _ in lengths]
+    return lengths, counts, stock_length
+
+
+def naive_fit(lengths, counts, stock_length, best_fit):
+    """Piece-by-piece FFD/BFD over a plain list of bars, O(n^2)"""
+    pieces = sorted((length for length, count in zip(lengths, counts) for _ in range(count)), reverse=True)
+    bars = []
+    for piece in pieces:
+        fits = [i for i, bar in enumerate(bars) if stock_length - sum(bar) >= piece]
+        if not fits:
+            bars.append([piece])
+        elif best_fit:
+            bars[min(fits, key=lambda i: stock_length - sum(bars[i]))].append(piece)
+        else:
+            bars[fits[0]].append(piece)
+    return bars
+
+
+def bar_multiset(usage):
+    return Counter(tuple(pieces) for pieces, _ in usage)
+
+
+def piece_multiset(usage):
+    return Counter(piece for pieces, _ in usage for piece in pieces)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_ffd_matches_naive(seed):
+    lengths, counts, stock_length = random_demand(seed, oversized=seed % 4 == 0)
+    usage = packing.pack(lengths, counts, stock_length, 'ffd')
+    expected = naive_fit(lengths, counts, stock_length, best_fit=False)
+    assert bar_multiset(usage) == Counter(tuple(bar) for bar in expected)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_bfd_matches_naive(seed):
+    lengths, counts, stock_length = random_demand(seed, oversized=seed % 4 == 0)
+    usage = packing.pack(lengths, counts, stock_length, 'bfd')
+    expected = naive_fit(lengths, counts, stock_length, best_fit=True)
+    # Ties between equally full bars may place a piece differently, the
+    # fill of the bars does not depend on them
+    assert len(usage) == len(expected)
+    assert sorted(used for _, used in usage) == sorted(sum(bar) for bar in expected)
+
+
+@pytest.mark.parametrize('mode', ['ffd', 'bfd', 'optimal'])
+@pytest.mark.parametrize('seed', range(8))
+def test_kerf_and_trims_never_overfill(mode, seed):
+    lengths, counts, stock_length = random_demand(seed)
+    kerf, trim_start, trim_end = 4, 15, 25
+    lengths = [min(length, stock_length - trim_start - trim_end) for length in lengths]
+    lengths, counts = zip(*{length: count for length, count in zip(lengths, counts)}.items())
+    usage = packing.pack(lengths, counts, stock_length, mode, kerf, trim_start, trim_end)
+
+    assert piece_multiset(usage) == Counter({length: count for length, count in zip(lengths, counts)})
+    for pieces, used in usage:
+        assert used == trim_start + sum(pieces) + (len(pieces) - 1) * kerf + trim_end
+        assert used <= stock_length
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_optimal_never_worse_than_ffd(seed):
+    lengths, counts, stock_length = random_demand(seed, oversized=seed % 5 == 0)
+    optimal = packing.pack(lengths, counts, stock_length, 'optimal')
+    ffd = packing.pack(lengths, counts, stock_length, 'ffd')
+
+    assert piece_multiset(optimal) == piece_multiset(ffd)
+    assert len(optimal) <= len(ffd)
+    assert optimal.lower_bound <= len(optimal)
+
+
+def test_lp_paths_agree(monkeypatch):
+    pytest.importorskip('scipy.optimize')
+    rng = np.random.default_rng(0)
+    demand = rng.integers(1, 20, 6)
+    columns = list(np.diag(rng.integers(1, 5, 6))) + [rng.integers(0, 3, 6) for _ in range(8)]
+    columns = [column for column in columns if column.any()]
+
+    monkeypatch.setattr(packing, '_linprog', None)
+    highs = packing._MasterLP(columns, demand).solve()
+    assert packing._linprog
+    monkeypatch.setattr(packing, '_linprog', False)
+    simplex = packing._MasterLP(columns, demand).solve()
+
+    assert simplex[0] == pytest.approx(highs[0])
+    assert np.all(np.array(columns).T @ simplex[1] >= demand - 1e-9)
+    assert demand @ simplex[2] == pytest.approx(simplex[0])
+
+    lengths, counts, stock_length = random_demand(3)
+    monkeypatch.setattr(packing, '_linprog', None)
+    with_highs = packing.pack(lengths, counts, stock_length, 'optimal')
+    monkeypatch.setattr(packing, '_linprog', False)
+    with_simplex = packing.pack(lengths, counts, stock_length, 'optimal')
+    assert len(with_simplex) == len(with_highs)
+    assert with_simplex.lower_bound == with_highs.lower_bound
+
+
+@pytest.mark.parametrize('mode', ['ffd', 'bfd', 'optimal'])
+def test_pieces_longer_than_trimmed_bar_are_counted(mode):
+    # 5990 fits the 6000 stock but not its 5980 usable length, 6500 neither
+    usage = packing.pack([5990, 6500, 3000], [2, 1, 3], 6000, mode, kerf=3, trim_start=10, trim_end=10)
+    assert usage.oversized == 3
+    assert sorted(pieces for pieces, _ in usage) == [[3000]] * 3 + [[5990]] * 2 + [[6500]]
+    assert packing.pack([3000], [3], 6000, mode, kerf=3, trim_start=10, trim_end=10).oversized == 0
@@ -0,0 +1,46 @@
+"""Startup must not pull in the export, plotting or network libraries.
+
+Measured with -X importtime in a fresh interpreter, so modules imported by
+other tests do not hide a regression.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only imported inside the functions that export, draw, check for updates or
+# solve an LP (scipy covers scipy.optimize, names are reduced to the package)
+HEAVY_MODULES = ('matplotlib', 'reportlab', 'xlsxwriter', 'requests', 'scipy')
+
+
+def imported_modules(statement):
+    """Top-level package names in the -X importtime log of running statement"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    modules = set()
+    for line in completed.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if line.startswith('import time:') and '|' in line:
+            name = line.rsplit('|', 1)[1].strip()
+            modules.add(name.split('.')[0])
+    return modules
+
+
+def test_import_co_is_light():
+    pytest.importorskip('pandas')
+    modules = imported_modules('import co')
+    assert 'co' in modules
+    assert not modules.intersection(HEAVY_MODULES)
+
+
+def test_import_gui_is_light():
+    pytest.importorskip('pandas')
+    pytest.importorskip('PyQt5')
+    modules = imported_modules('import gui')
+    assert 'gui' in modules
+    assert not modules.intersection(HEAVY_MODULES)